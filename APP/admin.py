@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import os
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and secrets.compare_digest(
+        token, ADMIN_TOKEN
+    )
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.metrics import CollectedMetric, Counter, Histogram, registry
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "64"))
+ADMISSION_CHECKOUT_RESERVED = int(os.getenv("ADMISSION_CHECKOUT_RESERVED", "16"))
+EXEMPT_PREFIXES = ("/static/", "/assets/", "/metrics", "/api/catalog/status")
+CHECKOUT_PREFIXES = ("/checkout", "/confirmation", "/cart", "/api/cart", "/api/orders")
+BROWSE_PREFIXES = ("/products/", "/custom-blend", "/api/search", "/api/events")
+SERVICE_TIME_WEIGHT = 0.2
+
+
+def class_setting(name: str, setting: str, default: str) -> float:
+    return float(os.getenv(f"ADMISSION_{name.upper()}_{setting}", default))
+
+
+class Shed(Exception):
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+
+    def take(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class RouteClass:
+    name: str
+    priority: int
+    concurrency: int
+    budget: float
+    bucket: TokenBucket
+    active: int = 0
+    service_time: float = 0.05
+    waiters: deque = field(default_factory=deque)
+
+
+def route_class(
+    name: str, priority: int, concurrency: str, budget_ms: str, rate: str, burst: str
+) -> RouteClass:
+    return RouteClass(
+        name=name,
+        priority=priority,
+        concurrency=int(class_setting(name, "CONCURRENCY", concurrency)),
+        budget=class_setting(name, "BUDGET_MS", budget_ms) / 1000,
+        bucket=TokenBucket(
+            class_setting(name, "RATE", rate), class_setting(name, "BURST", burst)
+        ),
+    )
+
+
+def default_classes() -> list[RouteClass]:
+    return [
+        route_class("checkout", 0, str(ADMISSION_CONCURRENCY), "2000", "0", "0"),
+        route_class("api", 1, "48", "250", "0", "0"),
+        route_class("browse", 2, "48", "250", "0", "0"),
+    ]
+
+
+def classify(path: str) -> Optional[str]:
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith(CHECKOUT_PREFIXES):
+        return "checkout"
+    if path == "/" or path.startswith(BROWSE_PREFIXES):
+        return "browse"
+    return "api"
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        classes: Optional[list[RouteClass]] = None,
+        capacity: int = ADMISSION_CONCURRENCY,
+        reserved: int = ADMISSION_CHECKOUT_RESERVED,
+    ) -> None:
+        self.capacity = capacity
+        self.reserved = reserved
+        self.classes = {
+            route.name: route
+            for route in sorted(
+                classes or default_classes(), key=lambda route: route.priority
+            )
+        }
+        self.active = 0
+
+    def share(self, route: RouteClass) -> int:
+        if route.priority == 0:
+            return self.capacity
+        return max(self.capacity - self.reserved, 1)
+
+    def admissible(self, route: RouteClass) -> bool:
+        return self.active < self.share(route) and route.active < route.concurrency
+
+    def queued_ahead(self, route: RouteClass) -> int:
+        return sum(
+            len(other.waiters)
+            for other in self.classes.values()
+            if other.priority <= route.priority
+        )
+
+    def estimated_wait(self, route: RouteClass) -> float:
+        slots = max(min(route.concurrency, self.share(route)), 1)
+        return (self.queued_ahead(route) + 1) * route.service_time / slots
+
+    def grant(self, route: RouteClass) -> None:
+        self.active += 1
+        route.active += 1
+
+    async def acquire(self, route: RouteClass) -> float:
+        retry_after = route.bucket.take()
+        if retry_after:
+            raise Shed("rate_limited", retry_after)
+        if not self.queued_ahead(route) and self.admissible(route):
+            self.grant(route)
+            return 0.0
+        estimated = self.estimated_wait(route)
+        if estimated > route.budget:
+            raise Shed("queue_full", estimated)
+
+        waiter = asyncio.get_running_loop().create_future()
+        route.waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), route.budget)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return time.perf_counter() - started
+            self.abandon(route, waiter)
+            raise Shed("queue_timeout", estimated)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(route, 0.0)
+            else:
+                self.abandon(route, waiter)
+            raise
+        return time.perf_counter() - started
+
+    def abandon(self, route: RouteClass, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        try:
+            route.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, route: RouteClass, elapsed: float) -> None:
+        self.active -= 1
+        route.active -= 1
+        if elapsed:
+            route.service_time += SERVICE_TIME_WEIGHT * (elapsed - route.service_time)
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        for route in self.classes.values():
+            while route.waiters and self.admissible(route):
+                waiter = route.waiters.popleft()
+                if waiter.done():
+                    continue
+                self.grant(route)
+                waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "reserved": self.reserved,
+            "active": self.active,
+            "classes": {
+                route.name: {
+                    "active": route.active,
+                    "queued": len(route.waiters),
+                    "concurrency": route.concurrency,
+                    "service_ms": round(route.service_time * 1000, 3),
+                }
+                for route in self.classes.values()
+            },
+        }
+
+
+admission = AdmissionController()
+
+SHED = registry.register(
+    Counter(
+        "http_requests_shed_total",
+        "Requests rejected by admission control.",
+        ("class", "reason"),
+    )
+)
+QUEUE_WAIT_SECONDS = registry.register(
+    Histogram(
+        "admission_queue_wait_seconds",
+        "Time admitted requests spent queued for a slot.",
+        ("class",),
+    )
+)
+registry.register(
+    CollectedMetric(
+        "admission_active_requests",
+        "Requests holding an admission slot.",
+        "gauge",
+        ("class",),
+        lambda: {
+            (name,): float(route.active) for name, route in admission.classes.items()
+        },
+    )
+)
+registry.register(
+    CollectedMetric(
+        "admission_queued_requests",
+        "Requests waiting for an admission slot.",
+        "gauge",
+        ("class",),
+        lambda: {
+            (name,): float(len(route.waiters))
+            for name, route in admission.classes.items()
+        },
+    )
+)
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController = admission,
+        enabled: bool = ADMISSION_ENABLED,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route = None
+        if self.enabled and scope["type"] == "http":
+            route = self.controller.classes.get(classify(scope["path"]) or "")
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await self.controller.acquire(route)
+        except Shed as shed:
+            SHED.inc(route.name, shed.reason)
+            retry_after = str(max(1, math.ceil(shed.retry_after)))
+            response = JSONResponse(
+                {"detail": "The shop is busy; please retry shortly."},
+                status_code=429 if shed.reason == "rate_limited" else 503,
+                headers={"Retry-After": retry_after, "Cache-Control": "no-store"},
+            )
+            await response(scope, receive, send)
+            return
+
+        QUEUE_WAIT_SECONDS.observe(waited, route.name)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route, time.perf_counter() - started)
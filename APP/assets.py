@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parent
+STATIC_DIR = BASE_DIR / "static"
+TEMPLATES_DIR = BASE_DIR / "templates"
+ASSETS_DIR = Path(os.getenv("ASSETS_DIR", str(BASE_DIR / "dist")))
+ASSETS_URL = "/assets"
+STATIC_URL = "/static"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+TEXT_SUFFIXES = {".css", ".js"}
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".txt"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+STATIC_REFERENCE = re.compile(r"/static/([A-Za-z0-9._-]+)")
+TEMPLATE_REFERENCE = re.compile(r"asset_url\(\s*['\"]([A-Za-z0-9._-]+)['\"]\s*\)")
+
+
+class AssetError(ValueError):
+    pass
+
+
+def static_name(path: str) -> Optional[str]:
+    if path.startswith(f"{STATIC_URL}/"):
+        return path[len(STATIC_URL) + 1 :]
+    if "/" in path or ":" in path:
+        return None
+    return path
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, dot, suffix = name.rpartition(".")
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def accepted_encodings(header: str) -> set[str]:
+    encodings = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if token.strip():
+            encodings.add(token.strip().lower())
+    return encodings
+
+
+def template_assets(directory: Path = TEMPLATES_DIR) -> set[str]:
+    names: set[str] = set()
+    for template in directory.glob("*.html"):
+        text = template.read_text()
+        names.update(TEMPLATE_REFERENCE.findall(text))
+        names.update(STATIC_REFERENCE.findall(text))
+    return names
+
+
+def catalog_assets() -> set[str]:
+    from app.data import CUSTOM_BLEND_OUTCOMES, PRODUCTS
+
+    images = [product.image for product in PRODUCTS]
+    for outcome in CUSTOM_BLEND_OUTCOMES:
+        images.extend(item.image for item in outcome.bases)
+        images.extend(item.image for item in outcome.botanicals)
+        images.extend(item.image for item in outcome.flavors)
+    return {name for name in map(static_name, images) if name}
+
+
+def compress_variants(path: Path, content: bytes) -> dict[str, int]:
+    sizes = {"raw": len(content)}
+    if path.suffix not in COMPRESSIBLE_SUFFIXES:
+        return sizes
+    variants = {"gzip": (".gz", gzip.compress(content, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        variants["br"] = (".br", brotli.compress(content, quality=11))
+    for encoding, (suffix, compressed) in variants.items():
+        if len(compressed) < len(content):
+            path.with_name(path.name + suffix).write_bytes(compressed)
+            sizes[encoding] = len(compressed)
+    return sizes
+
+
+def build_assets(
+    roots: Iterable[str],
+    source: Path = STATIC_DIR,
+    output: Path = ASSETS_DIR,
+) -> dict:
+    public = output / "static"
+    if output.exists():
+        shutil.rmtree(output)
+    public.mkdir(parents=True)
+
+    manifest: dict[str, str] = {}
+    sizes: dict[str, dict[str, int]] = {}
+    pending: set[str] = set()
+
+    def emit(name: str) -> str:
+        if name in manifest:
+            return manifest[name]
+        if name in pending:
+            raise AssetError(f"Circular asset reference through {name}.")
+        path = source / name
+        if not path.is_file():
+            raise AssetError(f"Missing static asset: {name}")
+        pending.add(name)
+        content = path.read_bytes()
+        if path.suffix in TEXT_SUFFIXES:
+            content = STATIC_REFERENCE.sub(
+                lambda match: f"{ASSETS_URL}/{emit(match.group(1))}",
+                content.decode(),
+            ).encode()
+        pending.discard(name)
+        hashed = fingerprint(name, content)
+        target = public / hashed
+        target.write_bytes(content)
+        sizes[name] = compress_variants(target, content)
+        manifest[name] = hashed
+        return hashed
+
+    for name in sorted(roots):
+        emit(name)
+
+    (output / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return {"manifest": manifest, "sizes": sizes}
+
+
+def read_manifest(directory: Path = ASSETS_DIR) -> dict[str, str]:
+    path = directory / MANIFEST_NAME
+    if not path.is_file():
+        return {}
+    return json.loads(path.read_text())
+
+
+class AssetManifest:
+    def __init__(self, directory: Path = ASSETS_DIR) -> None:
+        self.directory = directory
+        self.entries = read_manifest(directory)
+
+    @property
+    def public_dir(self) -> Path:
+        return self.directory / "static"
+
+    def url(self, path: str) -> str:
+        name = static_name(path)
+        if name is None:
+            return path
+        hashed = self.entries.get(name)
+        if hashed is None:
+            return f"{STATIC_URL}/{name}"
+        return f"{ASSETS_URL}/{hashed}"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        path = str(full_path)
+        if Path(path).suffix in COMPRESSIBLE_SUFFIXES:
+            headers["Vary"] = "Accept-Encoding"
+            for encoding, suffix in ENCODINGS:
+                variant = path + suffix
+                if encoding in accepted and os.path.isfile(variant):
+                    path, stat_result = variant, os.stat(variant)
+                    headers["Content-Encoding"] = encoding
+                    break
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fingerprint and precompress the static assets the site uses."
+    )
+    parser.add_argument("--output", type=Path, default=ASSETS_DIR)
+    args = parser.parse_args()
+
+    roots = template_assets() | catalog_assets()
+    result = build_assets(roots, output=args.output)
+
+    from app.images import IMAGE_FORMATS, build_images, image_formats
+
+    images = build_images(result["manifest"], output=args.output)
+    encoders = {extension for extension, _, _ in image_formats()}
+    missing = [
+        extension for extension, _, _ in IMAGE_FORMATS if extension not in encoders
+    ]
+    sizes = result["sizes"]
+    shipped = set(sizes)
+    skipped = sorted(
+        path.name
+        for path in STATIC_DIR.iterdir()
+        if path.is_file() and not path.name.startswith(".") and path.name not in shipped
+    )
+    for name in sorted(sizes):
+        variants = ", ".join(f"{key} {value}" for key, value in sizes[name].items())
+        print(f"{name} -> {result['manifest'][name]} ({variants})")
+    for name, sources in sorted(images.items()):
+        for source in sources:
+            widths = ", ".join(
+                f"{width}w {size}" for _, width, size in source["candidates"]
+            )
+            print(f"{name} -> {source['type']} ({widths})")
+    if missing:
+        print(
+            f"No Pillow encoder for {', '.join(missing)}; those image formats were "
+            "not built (AVIF needs Pillow 11.2 or newer)."
+        )
+    print(f"{len(shipped)} assets written to {args.output}; {len(skipped)} unused skipped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+import httpx
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[position]
+
+
+def summarize(latencies: Sequence[float], seconds: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "seconds": round(seconds, 4),
+        "rps": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def measure(action: Callable[[], Any], budget: float, min_runs: int = 3) -> dict:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    while len(latencies) < min_runs or time.perf_counter() - started < budget:
+        call_started = time.perf_counter()
+        action()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    requests: int,
+    concurrency: int,
+    json_body: Optional[dict] = None,
+) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    remaining = iter(range(requests))
+
+    async def send() -> httpx.Response:
+        return await client.request(method, path, json=json_body)
+
+    (await send()).raise_for_status()
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await send()
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "method": method,
+        "path": path,
+        "concurrency": concurrency,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        **summarize(latencies, elapsed),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(path: str | None, name: str, results: list[dict]) -> dict:
+    payload = {
+        "benchmark": name,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+    text = json.dumps(payload, indent=2)
+    if path:
+        Path(path).write_text(text + "\n")
+    print(text)
+    return payload
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICS = ("requests", "seconds", "rps", "p50_ms", "p95_ms", "p99_ms", "statuses")
+
+
+def result_key(result: dict) -> tuple:
+    return tuple(
+        (name, str(value)) for name, value in sorted(result.items()) if name not in METRICS
+    )
+
+
+def load(path: str) -> dict[tuple, dict]:
+    payload = json.loads(Path(path).read_text())
+    return {result_key(result): result for result in payload["results"]}
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare(baseline: str, current: str, threshold: float) -> list[dict]:
+    before, after = load(baseline), load(current)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        p95_change = change(old["p95_ms"], new["p95_ms"])
+        rps_change = change(old["rps"], new["rps"])
+        rows.append(
+            {
+                "case": " ".join(value for _, value in key),
+                "p95_ms": (old["p95_ms"], new["p95_ms"]),
+                "p95_change": p95_change,
+                "rps_change": rps_change,
+                "regressed": p95_change > threshold or rps_change < -threshold,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare two benchmark result files and flag regressions."
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Fractional p95 increase or RPS drop that counts as a regression.",
+    )
+    args = parser.parse_args()
+    rows = compare(args.baseline, args.current, args.threshold)
+    for row in rows:
+        old, new = row["p95_ms"]
+        flag = "REGRESSED" if row["regressed"] else "ok"
+        print(
+            f"{flag:9} {row['case']}: p95 {old} -> {new} ms "
+            f"({row['p95_change']:+.1%}), rps {row['rps_change']:+.1%}"
+        )
+    sys.exit(1 if any(row["regressed"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
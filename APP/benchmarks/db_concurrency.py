@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.benchmarks.common import drive, write_results
+from app.catalog_db import load_catalog, load_catalog_async
+from app.db import SessionLocal, get_async_db
+
+
+def build_app() -> FastAPI:
+    bench = FastAPI()
+
+    @bench.get("/sync")
+    async def sync_catalog():
+        with SessionLocal() as db:
+            return {"products": len(load_catalog(db)["products"])}
+
+    @bench.get("/async")
+    async def async_catalog(db: AsyncSession = Depends(get_async_db)):
+        return {"products": len((await load_catalog_async(db))["products"])}
+
+    return bench
+
+
+async def run(requests: int, concurrency_levels: list[int]) -> list[dict]:
+    transport = httpx.ASGITransport(app=build_app())
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for concurrency in concurrency_levels:
+            for path in ("/sync", "/async"):
+                results.append(
+                    await drive(client, "GET", path, requests, concurrency)
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare catalog reads through the sync and async session paths."
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    args = parser.parse_args()
+    results = asyncio.run(run(args.requests, args.concurrency))
+    write_results(args.output, "db_concurrency", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+from typing import Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.benchmarks.common import summarize, write_results
+from app.catalog import CatalogSnapshot, build_snapshot
+from app.db import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from app.inventory import StockError, reservation_grams
+from app.models import InventoryRecord
+from app.orders import (
+    OrderBlendRequest,
+    OrderLineRequest,
+    OrderRequest,
+    place_order,
+    price_lines,
+)
+
+
+def first_valid_blend(snapshot: CatalogSnapshot) -> OrderBlendRequest:
+    size = snapshot.blend_sizes[0].label
+    for outcome in snapshot.outcomes:
+        for base, botanical, flavor in itertools.product(
+            outcome.bases, outcome.botanicals, outcome.flavors
+        ):
+            blend = OrderBlendRequest(
+                outcome_id=outcome.id,
+                base_id=base.id,
+                botanical_ids=[botanical.id],
+                flavor_ids=[flavor.id],
+                size_label=size,
+            )
+            if snapshot.blend_engine.evaluate(blend).valid:
+                return blend
+    raise SystemExit("The catalog has no valid custom blend to order.")
+
+
+def order_for(
+    snapshot: CatalogSnapshot, product_id: Optional[str], blend: bool
+) -> OrderRequest:
+    items = []
+    if product_id is not None:
+        product = snapshot.index.products[product_id]
+        items.append(
+            OrderLineRequest(
+                product_id=product.id, size_label=product.sizes[0].label, quantity=1
+            )
+        )
+    return OrderRequest(
+        first_name="Stress",
+        last_name="Test",
+        email="stress@example.com",
+        address_line1="1 Tea Street",
+        city="Melbourne",
+        state="VIC",
+        postal="3000",
+        country="AU",
+        items=items,
+        custom_blend=first_valid_blend(snapshot) if blend else None,
+    )
+
+
+def stock_levels(skus: list[str]) -> dict[str, int]:
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(InventoryRecord.sku, InventoryRecord.available_grams).where(
+                InventoryRecord.sku.in_(skus)
+            )
+        )
+        return dict(rows.all())
+
+
+def restock(demand: dict[str, int], orders: int) -> dict[str, int]:
+    Base.metadata.create_all(engine)
+    levels = {key: grams * orders for key, grams in demand.items()}
+    with SessionLocal() as db, db.begin():
+        db.execute(
+            delete(InventoryRecord).where(InventoryRecord.sku.in_(list(levels)))
+        )
+        db.execute(
+            insert(InventoryRecord),
+            [{"sku": key, "available_grams": grams} for key, grams in levels.items()],
+        )
+    return levels
+
+
+async def checkout(order: OrderRequest, snapshot: CatalogSnapshot) -> str:
+    try:
+        async with AsyncSessionLocal() as db:
+            await place_order(db, order, snapshot)
+    except StockError:
+        return "rejected"
+    except SQLAlchemyError:
+        return "error"
+    return "placed"
+
+
+async def run(
+    attempts: int, capacity: int, concurrency: int, order: OrderRequest
+) -> dict:
+    snapshot = build_snapshot()
+    demand = reservation_grams(price_lines(order.items, order.custom_blend, snapshot))
+    initial = restock(demand, capacity)
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def attempt() -> str:
+        async with slots:
+            started = time.perf_counter()
+            outcome = await checkout(order, snapshot)
+            latencies.append(time.perf_counter() - started)
+            return outcome
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(attempt() for _ in range(attempts)))
+    elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+
+    placed = outcomes.count("placed")
+    final = stock_levels(list(demand))
+    expected = {key: initial[key] - grams * placed for key, grams in demand.items()}
+    return {
+        "attempts": attempts,
+        "capacity": capacity,
+        "concurrency": concurrency,
+        "placed": placed,
+        "rejected": outcomes.count("rejected"),
+        "errors": outcomes.count("error"),
+        "demand_grams": demand,
+        "final_grams": final,
+        "oversold": placed > capacity or any(grams < 0 for grams in final.values()),
+        "consistent": final == expected,
+        **summarize(latencies, elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Race parallel checkouts against limited stock and verify "
+        "that no ingredient is oversold."
+    )
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument(
+        "--capacity", type=int, default=50, help="Orders the seeded stock can fill."
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--product", help="Default: the first catalog product.")
+    parser.add_argument(
+        "--no-blend", action="store_true", help="Order only the fixed product."
+    )
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    args = parser.parse_args()
+
+    snapshot = build_snapshot()
+    product_id = args.product or snapshot.products[0].id
+    order = order_for(snapshot, product_id, blend=not args.no_blend)
+    result = asyncio.run(run(args.attempts, args.capacity, args.concurrency, order))
+    write_results(args.output, "inventory_stress", [result])
+    if result["oversold"] or not result["consistent"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
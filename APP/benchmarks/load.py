@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.benchmarks.common import drive, write_results
+
+ROUTES = (
+    ("GET", "/", None),
+    ("GET", "/products/solstice-rest", None),
+    ("GET", "/custom-blend/step-1", None),
+    ("GET", "/custom-blend/step-2", None),
+    ("GET", "/custom-blend/step-3", None),
+    ("GET", "/custom-blend/step-4", None),
+    ("GET", "/custom-blend/fragment/bases?outcome=sleep", None),
+    (
+        "GET",
+        "/custom-blend/fragment/flavors?outcome=sleep&base=sleep-rooibos"
+        "&botanicals=chamomile",
+        None,
+    ),
+    ("GET", "/cart", None),
+    ("GET", "/checkout", None),
+    ("GET", "/confirmation", None),
+    ("GET", "/api/catalog", None),
+    ("GET", "/api/products?fields=id,name&limit=2", None),
+    ("GET", "/api/outcomes/sleep", None),
+    ("GET", "/api/catalog/status", None),
+    (
+        "POST",
+        "/api/blend/evaluate",
+        {
+            "outcome_id": "sleep",
+            "base_id": "sleep-rooibos",
+            "botanical_ids": ["chamomile"],
+            "flavor_ids": ["vanilla-bean"],
+            "size_label": "50g",
+        },
+    ),
+    ("POST", "/api/blend/recommendations", {"outcome_id": "sleep", "limit": 5}),
+)
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@asynccontextmanager
+async def asgi_client() -> AsyncIterator[httpx.AsyncClient]:
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+@asynccontextmanager
+async def server_process(
+    command: list[str],
+    port: int,
+    startup_timeout: float,
+    env: Optional[dict[str, str]] = None,
+) -> AsyncIterator[tuple[httpx.AsyncClient, subprocess.Popen]]:
+    server = subprocess.Popen(command, env={**os.environ, **(env or {})})
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=256, max_keepalive_connections=256)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                try:
+                    (await client.get("/api/catalog/status")).raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError(f"{command[2]} did not start")
+                    await asyncio.sleep(0.1)
+            yield client, server
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def uvicorn_command(port: int, workers: int) -> list[str]:
+    return [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+    ]
+
+
+def serve_command(port: int, workers: int) -> list[str]:
+    return [
+        sys.executable,
+        "-m",
+        "app.serve",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+
+
+@asynccontextmanager
+async def launcher_client(
+    target: str, workers: int, startup_timeout: float
+) -> AsyncIterator[httpx.AsyncClient]:
+    port = free_port()
+    command = (uvicorn_command if target == "uvicorn" else serve_command)(port, workers)
+    async with server_process(command, port, startup_timeout) as (client, _):
+        yield client
+
+
+@asynccontextmanager
+async def url_client(base_url: str) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=256, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        yield client
+
+
+async def run(
+    target: str,
+    requests: int,
+    concurrency_levels: list[int],
+    routes: Optional[list[str]] = None,
+    url: Optional[str] = None,
+    workers: int = 1,
+) -> list[dict]:
+    if target == "asgi":
+        client_context = asgi_client()
+    elif target in ("uvicorn", "serve"):
+        client_context = launcher_client(target, workers, startup_timeout=30)
+    else:
+        client_context = url_client(url or "http://127.0.0.1:8000")
+
+    selected = [route for route in ROUTES if not routes or route[1] in routes]
+    results = []
+    async with client_context as client:
+        for concurrency in concurrency_levels:
+            for method, path, body in selected:
+                result = await drive(client, method, path, requests, concurrency, body)
+                results.append({"target": target, **result})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Drive every route concurrently and report RPS and latency."
+    )
+    parser.add_argument(
+        "--target",
+        choices=["asgi", "uvicorn", "serve", "url"],
+        default="asgi",
+        help="In-process ASGI transport, local uvicorn or app.serve workers, or --url.",
+    )
+    parser.add_argument("--url", help="Base URL for --target url.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--route", action="append", help="Only drive these paths.")
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    args = parser.parse_args()
+    results = asyncio.run(
+        run(
+            args.target,
+            args.requests,
+            args.concurrency,
+            args.route,
+            args.url,
+            args.workers,
+        )
+    )
+    write_results(args.output, "load", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from app.benchmarks.common import drive, write_results
+from app.benchmarks.load import (
+    ROUTES,
+    free_port,
+    serve_command,
+    server_process,
+    uvicorn_command,
+)
+
+LAUNCHERS = {"uvicorn": uvicorn_command, "serve": serve_command}
+SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "uss",
+    "Private_Dirty": "uss",
+}
+
+
+def worker_pids(parent: int) -> list[int]:
+    pids = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        if int(stat.rpartition(")")[2].split()[1]) == parent and (
+            b"resource_tracker" not in cmdline
+        ):
+            pids.append(int(entry.name))
+    return sorted(pids)
+
+
+def memory_mb(pid: int) -> dict[str, float]:
+    totals = dict.fromkeys(set(SMAPS_FIELDS.values()), 0.0)
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, _, value = line.partition(":")
+        if name in SMAPS_FIELDS:
+            totals[SMAPS_FIELDS[name]] += int(value.split()[0]) / 1024
+    return {name: round(value, 2) for name, value in totals.items()}
+
+
+async def measure(launcher: str, workers: int, requests: int) -> list[dict]:
+    port = free_port()
+    command = LAUNCHERS[launcher](port, workers)
+    async with server_process(command, port, startup_timeout=60) as (client, server):
+        deadline = time.monotonic() + 30
+        while len(worker_pids(server.pid)) < workers and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for method, path, body in ROUTES:
+            await drive(client, method, path, requests, workers * 4, body)
+        await asyncio.sleep(0.5)
+        rows = [
+            {"launcher": launcher, "process": "parent", **memory_mb(server.pid)}
+        ]
+        rows.extend(
+            {"launcher": launcher, "process": f"worker {slot}", **memory_mb(pid)}
+            for slot, pid in enumerate(worker_pids(server.pid))
+        )
+    totals = {
+        field: round(sum(row[field] for row in rows), 2)
+        for field in ("rss", "pss", "shared", "uss")
+    }
+    rows.append({"launcher": launcher, "process": "total", **totals})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare per-worker RSS/PSS of uvicorn workers and app.serve."
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument(
+        "--launcher", action="append", choices=sorted(LAUNCHERS), help="Default: both."
+    )
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    args = parser.parse_args()
+    results = []
+    for launcher in args.launcher or sorted(LAUNCHERS, reverse=True):
+        results.extend(asyncio.run(measure(launcher, args.workers, args.requests)))
+    write_results(args.output, "memory", results)
+
+
+if __name__ == "__main__":
+    main()
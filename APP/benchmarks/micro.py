@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+
+from starlette.requests import Request
+
+from app.benchmarks.common import measure, write_results
+from app.benchmarks.synthetic import SCALES, scaled_catalog
+from app.blend_fragments import fragment_context
+from app.catalog import (
+    CatalogSnapshot,
+    build_blend_outcomes,
+    build_snapshot,
+    get_product,
+    install_snapshot,
+)
+from app.main import build_blend_context, templates
+from app.sessions import CartState, cart_view
+
+
+def bench_request(path: str = "/") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "headers": [],
+            "query_string": b"",
+            "server": ("bench", 80),
+        }
+    )
+
+
+def template_contexts(snapshot: CatalogSnapshot) -> dict[str, dict]:
+    request = bench_request()
+    blend_context = build_blend_context(request, snapshot)
+    return {
+        "index.html": {"request": request, "products": snapshot.products},
+        "product_detail.html": {"request": request, "product": snapshot.products[0]},
+        "custom_blend_step1.html": blend_context,
+        "custom_blend_step2.html": blend_context,
+        "custom_blend_step3.html": blend_context,
+        "custom_blend_step4.html": blend_context,
+        "custom_blend_fragment.html": fragment_context(
+            snapshot, "flavors", snapshot.outcomes[0].id
+        ),
+        "cart.html": {"request": request, "cart": cart_view(CartState(), snapshot)},
+        "checkout.html": {"request": request},
+        "confirmation.html": {"request": request},
+    }
+
+
+def run_scale(scale: int, budget: float) -> list[dict]:
+    catalog = scaled_catalog(scale)
+    snapshots: list[CatalogSnapshot] = []
+    results = [
+        {
+            "scale": scale,
+            "case": "build_snapshot",
+            **measure(lambda: snapshots.append(build_snapshot(**catalog)), 0, 1),
+        }
+    ]
+    snapshot = snapshots[-1]
+    install_snapshot(snapshot)
+    product_ids = [product.id for product in snapshot.products]
+    request = bench_request()
+
+    cases = {
+        "build_blend_outcomes": lambda: build_blend_outcomes(catalog["outcomes"]),
+        "build_blend_context": lambda: build_blend_context(request, snapshot),
+        "get_product": lambda: [get_product(product_id) for product_id in product_ids],
+        "search:prefix": lambda: snapshot.search_index.search("cham"),
+        "search:typo": lambda: snapshot.search_index.search("lavendar"),
+        "search:faceted": lambda: snapshot.search_index.search(
+            "tea", kind="product", outcome="Sleep"
+        ),
+    }
+    for name, context in template_contexts(snapshot).items():
+        template = templates.get_template(name)
+        cases[f"render:{name}"] = lambda template=template, context=context: (
+            template.render(context)
+        )
+
+    for name, action in cases.items():
+        results.append({"scale": scale, "case": name, **measure(action, budget)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark catalog operations and template rendering."
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument(
+        "--budget", type=float, default=0.5, help="Seconds to spend per case."
+    )
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    args = parser.parse_args()
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(scale, args.budget))
+    write_results(args.output, "micro", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from app.benchmarks.common import write_results
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def package_totals(entries: list[tuple[str, int, int]]) -> dict[str, int]:
+    totals: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in entries:
+        package = name if name.startswith("app.") else name.split(".")[0]
+        totals[package] += self_us
+    return totals
+
+
+def timed(phase: str, action) -> dict:
+    started = time.perf_counter()
+    action()
+    return {
+        "kind": "phase",
+        "name": phase,
+        "ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def boot_phases(module: str) -> list[dict]:
+    phases = [timed(f"import {module}", lambda: importlib.import_module(module))]
+
+    from app.catalog import build_snapshot
+    from app.templating import precompile_templates
+
+    phases.append(timed("build catalog snapshot", build_snapshot))
+    templates = getattr(sys.modules[module], "templates", None)
+    if templates is not None:
+        phases.append(
+            timed("precompile templates", lambda: precompile_templates(templates.env))
+        )
+    return phases
+
+
+def run(module: str, top: int) -> list[dict]:
+    entries = import_times(module)
+    slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]
+    packages = sorted(package_totals(entries).items(), key=lambda item: -item[1])
+    results = boot_phases(module)
+    results.extend(
+        {"kind": "package", "name": name, "self_ms": round(self_us / 1000, 3)}
+        for name, self_us in packages[:top]
+    )
+    results.extend(
+        {
+            "kind": "module",
+            "name": name,
+            "self_ms": round(self_us / 1000, 3),
+            "cumulative_ms": round(cumulative_us / 1000, 3),
+        }
+        for name, self_us, cumulative_us in slowest
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Break down worker start-up time by import and boot phase."
+    )
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    args = parser.parse_args()
+    write_results(args.output, "startup", run(args.module, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from app.data import (
+    BLEND_OUTCOME_AXES,
+    CUSTOM_BLEND_OUTCOMES,
+    CUSTOM_BLEND_SIZES,
+    FLAVOR_CATEGORIES,
+    PRODUCTS,
+    BlendOutcome,
+    Product,
+)
+
+SCALES = (1, 10, 100, 1000)
+
+
+def scaled_id(item_id: str, copy: int) -> str:
+    return item_id if copy == 0 else f"{item_id}-x{copy}"
+
+
+def scaled_ids(item_ids: list[str], copy: int) -> list[str]:
+    return [scaled_id(item_id, copy) for item_id in item_ids]
+
+
+def copy_product(product: Product, copy: int) -> Product:
+    if copy == 0:
+        return product
+    return product.model_copy(
+        update={"id": scaled_id(product.id, copy), "name": f"{product.name} {copy}"}
+    )
+
+
+def copy_outcome(outcome: BlendOutcome, copy: int) -> BlendOutcome:
+    if copy == 0:
+        return outcome
+    return outcome.model_copy(
+        update={
+            "id": scaled_id(outcome.id, copy),
+            "bases": [
+                base.model_copy(update={"id": scaled_id(base.id, copy)})
+                for base in outcome.bases
+            ],
+            "botanicals": [
+                botanical.model_copy(
+                    update={
+                        "id": scaled_id(botanical.id, copy),
+                        "base_ids": scaled_ids(botanical.base_ids, copy),
+                    }
+                )
+                for botanical in outcome.botanicals
+            ],
+            "flavors": [
+                flavor.model_copy(
+                    update={
+                        "id": scaled_id(flavor.id, copy),
+                        "base_ids": scaled_ids(flavor.base_ids, copy),
+                        "botanical_ids": scaled_ids(flavor.botanical_ids, copy),
+                        "incompatible_with": scaled_ids(flavor.incompatible_with, copy),
+                    }
+                )
+                for flavor in outcome.flavors
+            ],
+        }
+    )
+
+
+def scaled_catalog(scale: int) -> dict:
+    return {
+        "products": [
+            copy_product(product, copy) for copy in range(scale) for product in PRODUCTS
+        ],
+        "outcomes": [
+            copy_outcome(outcome, copy)
+            for copy in range(scale)
+            for outcome in CUSTOM_BLEND_OUTCOMES
+        ],
+        "outcome_axes": BLEND_OUTCOME_AXES,
+        "flavor_categories": FLAVOR_CATEGORIES,
+        "blend_sizes": CUSTOM_BLEND_SIZES,
+    }
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from app.benchmarks.common import percentile, write_results
+from app.benchmarks.load import free_port, server_process, uvicorn_command
+from app.benchmarks.synthetic import SCALES, scaled_catalog
+from app.catalog import build_snapshot
+from app.catalog_provider import write_catalog_file
+
+PATHS = ("/", "/custom-blend/step-4")
+MODES = {"buffered": "0", "streamed": "1"}
+
+
+async def timed_get(client: httpx.AsyncClient, path: str) -> tuple[float, float, int]:
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    async with client.stream("GET", path) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+    total = time.perf_counter() - started
+    return first_byte if first_byte is not None else total, total, size
+
+
+def milliseconds(values: list[float], fraction: float) -> float:
+    return round(percentile(values, fraction) * 1000, 3)
+
+
+async def measure(catalog_file: Path, scale: int, mode: str, requests: int) -> list[dict]:
+    port = free_port()
+    env = {
+        "CATALOG_SOURCE": "file",
+        "CATALOG_FILE": str(catalog_file),
+        "TEMPLATE_STREAMING": MODES[mode],
+        "PAGE_CACHE_SIZE": "0",
+    }
+    results = []
+    command = uvicorn_command(port, 1)
+    async with server_process(command, port, 300, env) as (client, _):
+        for path in PATHS:
+            await timed_get(client, path)
+            samples = [await timed_get(client, path) for _ in range(requests)]
+            first_bytes = [sample[0] for sample in samples]
+            totals = [sample[1] for sample in samples]
+            results.append(
+                {
+                    "scale": scale,
+                    "mode": mode,
+                    "path": path,
+                    "requests": requests,
+                    "bytes": samples[-1][2],
+                    "ttfb_p50_ms": milliseconds(first_bytes, 0.50),
+                    "ttfb_p95_ms": milliseconds(first_bytes, 0.95),
+                    "total_p50_ms": milliseconds(totals, 0.50),
+                    "total_p95_ms": milliseconds(totals, 0.95),
+                }
+            )
+    return results
+
+
+async def run(scales: list[int], requests: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            catalog_file = Path(directory) / f"catalog-{scale}.json"
+            write_catalog_file(catalog_file, build_snapshot(**scaled_catalog(scale)))
+            for mode in MODES:
+                results.extend(await measure(catalog_file, scale, mode, requests))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare time-to-first-byte and total time of buffered and "
+        "streamed page renders on synthetic catalogs."
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES[:3]))
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    args = parser.parse_args()
+    results = asyncio.run(run(args.scales, args.requests))
+    write_results(args.output, "ttfb", results)
+
+
+if __name__ == "__main__":
+    main()
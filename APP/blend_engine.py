@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from itertools import combinations
+from types import MappingProxyType
+from typing import Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.catalog_index import CatalogIndex
+from app.data import BlendOutcome, ProductSize
+
+BOTANICAL_MIN = 1
+BOTANICAL_MAX = 2
+FLAVOR_MIN = 1
+FLAVOR_MAX = 2
+SCORE_MAX = 5
+AXIS_ALIASES = {"Alertness": "Energy"}
+
+
+class BlendSelection(BaseModel):
+    outcome_id: str
+    base_id: Optional[str] = None
+    botanical_ids: List[str] = []
+    flavor_ids: List[str] = []
+    size_label: Optional[str] = None
+
+
+class BlendEvaluation(BaseModel):
+    valid: bool
+    errors: List[str]
+    alignment: dict[str, int]
+    flavor_profile: dict[str, int]
+    available_botanicals: List[str]
+    available_flavors: List[str]
+    completion_count: int
+    price_aud: Optional[float] = None
+
+
+def axis_value(values: Mapping[str, int], axis: str) -> int:
+    if axis in values:
+        return values[axis] or 0
+    alias = AXIS_ALIASES.get(axis)
+    if alias is not None:
+        return values.get(alias, 0) or 0
+    return 0
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def _mask(ids: Sequence[str], positions: Mapping[str, int]) -> int:
+    mask = 0
+    for item_id in ids:
+        position = positions.get(item_id)
+        if position is not None:
+            mask |= 1 << position
+    return mask
+
+
+def _subsets(mask: int, required: int, low: int, high: int) -> Iterator[int]:
+    optional = [1 << bit for bit in iter_bits(mask & ~required)]
+    have = popcount(required)
+    for size in range(max(low - have, 0), high - have + 1):
+        for extra in combinations(optional, size):
+            yield required | sum(extra)
+
+
+@dataclass(frozen=True)
+class OutcomeEngine:
+    outcome_id: str
+    base_ids: tuple[str, ...]
+    botanical_ids: tuple[str, ...]
+    flavor_ids: tuple[str, ...]
+    base_positions: Mapping[str, int]
+    botanical_positions: Mapping[str, int]
+    flavor_positions: Mapping[str, int]
+    base_botanicals: tuple[int, ...]
+    base_flavors: tuple[int, ...]
+    botanical_flavors: tuple[int, ...]
+    flavor_conflicts: tuple[int, ...]
+    base_alignment: np.ndarray
+    botanical_contributions: np.ndarray
+    flavor_spectrum: np.ndarray
+    base_completions: tuple[int, ...] = ()
+
+    def botanical_mask(self, botanical_ids: Sequence[str]) -> int:
+        return _mask(botanical_ids, self.botanical_positions)
+
+    def flavor_mask(self, flavor_ids: Sequence[str]) -> int:
+        return _mask(flavor_ids, self.flavor_positions)
+
+    def botanical_options(self, base: int) -> int:
+        return self.base_botanicals[base]
+
+    def flavor_options(self, base: int, botanicals: int) -> int:
+        if not botanicals:
+            return 0
+        compatible = self.base_flavors[base]
+        linked = 0
+        for botanical in iter_bits(botanicals):
+            linked |= self.botanical_flavors[botanical]
+        return (linked & compatible) or compatible
+
+    def conflicts(self, flavors: int) -> int:
+        blocked = 0
+        for flavor in iter_bits(flavors):
+            blocked |= self.flavor_conflicts[flavor]
+        return blocked
+
+    def alignment(self, base: int, botanicals: int) -> np.ndarray:
+        rows = list(iter_bits(botanicals))
+        totals = self.base_alignment[base]
+        totals = totals + self.botanical_contributions[rows].sum(axis=0)
+        return np.minimum(totals, SCORE_MAX)
+
+    def flavor_profile(self, flavors: int) -> np.ndarray:
+        rows = list(iter_bits(flavors))
+        return np.minimum(self.flavor_spectrum[rows].sum(axis=0), SCORE_MAX)
+
+    def iter_completions(
+        self, base: int, botanicals: int = 0, flavors: int = 0
+    ) -> Iterator[tuple[int, int]]:
+        botanical_options = self.botanical_options(base)
+        if botanicals & ~botanical_options:
+            return
+        for botanical_set in _subsets(
+            botanical_options, botanicals, BOTANICAL_MIN, BOTANICAL_MAX
+        ):
+            flavor_options = self.flavor_options(base, botanical_set)
+            if flavors & ~flavor_options:
+                continue
+            for flavor_set in _subsets(flavor_options, flavors, FLAVOR_MIN, FLAVOR_MAX):
+                if not flavor_set & self.conflicts(flavor_set):
+                    yield botanical_set, flavor_set
+
+
+    def count_flavor_sets(self, options: int, flavors: int = 0) -> int:
+        if flavors & ~options:
+            return 0
+        blocked = self.conflicts(flavors)
+        if flavors & blocked:
+            return 0
+        free = [
+            bit
+            for bit in iter_bits(options & ~flavors & ~blocked)
+            if not self.flavor_conflicts[bit] >> bit & 1
+        ]
+        free_mask = sum(1 << bit for bit in free)
+        clashes = sum(
+            popcount(self.flavor_conflicts[bit] & free_mask) for bit in free
+        )
+        have = popcount(flavors)
+        total = 0
+        for size in range(max(FLAVOR_MIN - have, 0), FLAVOR_MAX - have + 1):
+            if size == 0:
+                total += 1
+            elif size == 1:
+                total += len(free)
+            elif size == 2:
+                total += len(free) * (len(free) - 1) // 2 - clashes // 2
+            else:
+                for extra in combinations(free, size):
+                    chosen = sum(1 << bit for bit in extra)
+                    if not chosen & self.conflicts(chosen):
+                        total += 1
+        return total
+
+    def count_completions(
+        self, base: int, botanicals: int = 0, flavors: int = 0
+    ) -> int:
+        if not botanicals and not flavors and self.base_completions:
+            return self.base_completions[base]
+        botanical_options = self.botanical_options(base)
+        if botanicals & ~botanical_options:
+            return 0
+        counted: dict[int, int] = {}
+        total = 0
+        for botanical_set in _subsets(
+            botanical_options, botanicals, BOTANICAL_MIN, BOTANICAL_MAX
+        ):
+            flavor_options = self.flavor_options(base, botanical_set)
+            if flavor_options not in counted:
+                counted[flavor_options] = self.count_flavor_sets(
+                    flavor_options, flavors
+                )
+            total += counted[flavor_options]
+        return total
+
+
+def build_outcome_engine(
+    outcome: BlendOutcome,
+    index: CatalogIndex,
+    outcome_axes: Sequence[str],
+    flavor_categories: Sequence[str],
+) -> OutcomeEngine:
+    base_ids = tuple(base.id for base in outcome.bases)
+    botanical_ids = tuple(botanical.id for botanical in outcome.botanicals)
+    flavor_ids = tuple(flavor.id for flavor in outcome.flavors)
+    base_positions = {item_id: bit for bit, item_id in enumerate(base_ids)}
+    botanical_positions = {item_id: bit for bit, item_id in enumerate(botanical_ids)}
+    flavor_positions = {item_id: bit for bit, item_id in enumerate(flavor_ids)}
+
+    def matrix(rows: Sequence[Mapping[str, int]], columns: Sequence[str]) -> np.ndarray:
+        values = np.array(
+            [[axis_value(row, column) for column in columns] for row in rows],
+            dtype=np.int16,
+        )
+        return values.reshape(len(rows), len(columns))
+
+    engine = OutcomeEngine(
+        outcome_id=outcome.id,
+        base_ids=base_ids,
+        botanical_ids=botanical_ids,
+        flavor_ids=flavor_ids,
+        base_positions=MappingProxyType(base_positions),
+        botanical_positions=MappingProxyType(botanical_positions),
+        flavor_positions=MappingProxyType(flavor_positions),
+        base_botanicals=tuple(
+            _mask(sorted(index.base_botanicals[base_id]), botanical_positions)
+            for base_id in base_ids
+        ),
+        base_flavors=tuple(
+            _mask(sorted(index.base_flavors[base_id]), flavor_positions)
+            for base_id in base_ids
+        ),
+        botanical_flavors=tuple(
+            _mask(sorted(index.botanical_flavors[botanical_id]), flavor_positions)
+            for botanical_id in botanical_ids
+        ),
+        flavor_conflicts=tuple(
+            _mask(sorted(index.flavor_incompatible[flavor_id]), flavor_positions)
+            for flavor_id in flavor_ids
+        ),
+        base_alignment=matrix([base.alignment for base in outcome.bases], outcome_axes),
+        botanical_contributions=matrix(
+            [botanical.contributions for botanical in outcome.botanicals], outcome_axes
+        ),
+        flavor_spectrum=matrix(
+            [flavor.spectrum for flavor in outcome.flavors], flavor_categories
+        ),
+    )
+    return replace(
+        engine,
+        base_completions=tuple(
+            engine.count_completions(base) for base in range(len(base_ids))
+        ),
+    )
+
+
+@dataclass(frozen=True)
+class BlendEngine:
+    outcomes: Mapping[str, OutcomeEngine]
+    outcome_axes: tuple[str, ...]
+    flavor_categories: tuple[str, ...]
+    index: CatalogIndex
+    sizes: Mapping[str, ProductSize]
+
+    def evaluate(self, selection: BlendSelection) -> BlendEvaluation:
+        errors: list[str] = []
+        engine = self.outcomes.get(selection.outcome_id)
+        if engine is None:
+            return self._result(
+                errors=[f"Unknown outcome: {selection.outcome_id}"],
+            )
+
+        base = engine.base_positions.get(selection.base_id or "")
+        if base is None:
+            if selection.base_id:
+                errors.append(f"{selection.base_id} is not a base for this outcome.")
+            else:
+                errors.append("Choose a base tea.")
+            return self._result(errors=errors)
+
+        botanicals = engine.botanical_mask(selection.botanical_ids)
+        flavors = engine.flavor_mask(selection.flavor_ids)
+        botanical_options = engine.botanical_options(base)
+
+        for botanical_id in selection.botanical_ids:
+            position = engine.botanical_positions.get(botanical_id)
+            if position is None or not botanical_options >> position & 1:
+                errors.append(f"{self._title(botanical_id)} does not suit this base.")
+        botanicals &= botanical_options
+        botanical_count = popcount(botanicals)
+        if botanical_count < BOTANICAL_MIN:
+            errors.append(
+                f"Select at least {BOTANICAL_MIN} botanical"
+                f"{'' if BOTANICAL_MIN == 1 else 's'}."
+            )
+        if botanical_count > BOTANICAL_MAX:
+            errors.append(f"Select up to {BOTANICAL_MAX} botanicals.")
+
+        flavor_options = engine.flavor_options(base, botanicals)
+        for flavor_id in selection.flavor_ids:
+            position = engine.flavor_positions.get(flavor_id)
+            if position is None or not flavor_options >> position & 1:
+                errors.append(
+                    f"{self._title(flavor_id)} is not available for this blend."
+                )
+        flavors &= flavor_options
+        flavor_count = popcount(flavors)
+        if flavor_count < FLAVOR_MIN:
+            errors.append(
+                f"Select at least {FLAVOR_MIN} flavor botanical"
+                f"{'' if FLAVOR_MIN == 1 else 's'}."
+            )
+        if flavor_count > FLAVOR_MAX:
+            errors.append(f"Select up to {FLAVOR_MAX} flavor botanicals.")
+        blocked = engine.conflicts(flavors)
+        for flavor in iter_bits(flavors & blocked):
+            for other in iter_bits(engine.flavor_conflicts[flavor] & flavors):
+                if flavor < other:
+                    errors.append(
+                        f"{self._title(engine.flavor_ids[flavor])} clashes with "
+                        f"{self._title(engine.flavor_ids[other])}."
+                    )
+
+        price_aud = None
+        if selection.size_label is not None:
+            size = self.sizes.get(selection.size_label)
+            if size is None:
+                errors.append(f"Unknown blend size: {selection.size_label}")
+            else:
+                price_aud = size.price_aud
+
+        available_botanicals = 0
+        if botanical_count < BOTANICAL_MAX:
+            available_botanicals = botanical_options & ~botanicals
+        available_flavors = 0
+        if flavor_count < FLAVOR_MAX:
+            available_flavors = flavor_options & ~flavors & ~blocked
+
+        return self._result(
+            errors=errors,
+            alignment=engine.alignment(base, botanicals),
+            flavor_profile=engine.flavor_profile(flavors),
+            available_botanicals=[
+                engine.botanical_ids[bit] for bit in iter_bits(available_botanicals)
+            ],
+            available_flavors=[
+                engine.flavor_ids[bit] for bit in iter_bits(available_flavors)
+            ],
+            completion_count=engine.count_completions(base, botanicals, flavors),
+            price_aud=price_aud,
+        )
+
+    def _title(self, item_id: str) -> str:
+        item = self.index.botanicals.get(item_id) or self.index.flavors.get(item_id)
+        return item.title if item is not None else item_id
+
+    def _result(
+        self,
+        *,
+        errors: list[str],
+        alignment: np.ndarray | None = None,
+        flavor_profile: np.ndarray | None = None,
+        available_botanicals: list[str] | None = None,
+        available_flavors: list[str] | None = None,
+        completion_count: int = 0,
+        price_aud: float | None = None,
+    ) -> BlendEvaluation:
+        if alignment is None:
+            alignment = np.zeros(len(self.outcome_axes), dtype=np.int16)
+        if flavor_profile is None:
+            flavor_profile = np.zeros(len(self.flavor_categories), dtype=np.int16)
+        return BlendEvaluation(
+            valid=not errors,
+            errors=errors,
+            alignment=dict(zip(self.outcome_axes, alignment.tolist())),
+            flavor_profile=dict(zip(self.flavor_categories, flavor_profile.tolist())),
+            available_botanicals=available_botanicals or [],
+            available_flavors=available_flavors or [],
+            completion_count=completion_count,
+            price_aud=price_aud,
+        )
+
+
+def build_blend_engine(
+    outcomes: Sequence[BlendOutcome],
+    index: CatalogIndex,
+    outcome_axes: Sequence[str],
+    flavor_categories: Sequence[str],
+    blend_sizes: Sequence[ProductSize],
+) -> BlendEngine:
+    return BlendEngine(
+        outcomes=MappingProxyType(
+            {
+                outcome.id: build_outcome_engine(
+                    outcome, index, outcome_axes, flavor_categories
+                )
+                for outcome in outcomes
+            }
+        ),
+        outcome_axes=tuple(outcome_axes),
+        flavor_categories=tuple(flavor_categories),
+        index=index,
+        sizes=MappingProxyType({size.label: size for size in blend_sizes}),
+    )
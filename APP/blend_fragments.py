@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from app.blend_engine import BOTANICAL_MAX
+from app.catalog import CatalogSnapshot
+from app.catalog_api import find_outcome
+from app.data import BlendOutcome
+
+FRAGMENT_STEPS = ("bases", "botanicals", "flavors")
+
+
+class FragmentError(Exception):
+    def __init__(self, message: str, status_code: int = 422) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_ids(value: Optional[str]) -> list[str]:
+    if not value:
+        return []
+    return sorted({item.strip() for item in value.split(",") if item.strip()})
+
+
+def fragment_key(
+    step: str, outcome_id: str, base_id: Optional[str], botanical_ids: Sequence[str]
+) -> str:
+    if step == "bases":
+        return f"fragment|{step}|{outcome_id}"
+    if step == "botanicals":
+        return f"fragment|{step}|{outcome_id}|{base_id or ''}"
+    return f"fragment|{step}|{outcome_id}|{base_id or ''}|{','.join(botanical_ids)}"
+
+
+def fragment_selection(
+    snapshot: CatalogSnapshot,
+    step: str,
+    outcome_id: str,
+    base_id: Optional[str] = None,
+    botanical_ids: Sequence[str] = (),
+) -> tuple[BlendOutcome, Optional[str], list[str]]:
+    if step not in FRAGMENT_STEPS:
+        raise FragmentError(f"Unknown blend step: {step}", status_code=404)
+    outcome = find_outcome(snapshot, outcome_id)
+    if outcome is None:
+        raise FragmentError(f"Unknown outcome: {outcome_id}", status_code=404)
+    if step == "bases" or not base_id:
+        return outcome, None, []
+
+    engine = snapshot.blend_engine.outcomes[outcome.id]
+    base = engine.base_positions.get(base_id)
+    if base is None:
+        raise FragmentError(f"{base_id} is not a base for this outcome.")
+    if step == "botanicals":
+        return outcome, base_id, []
+    if len(botanical_ids) > BOTANICAL_MAX:
+        raise FragmentError(f"Choose at most {BOTANICAL_MAX} botanicals.")
+    options = engine.botanical_options(base)
+    positions = engine.botanical_positions
+    known = [
+        item_id
+        for item_id in sorted(set(botanical_ids))
+        if item_id in positions and options >> positions[item_id] & 1
+    ]
+    return outcome, base_id, known
+
+
+def fragment_context(
+    snapshot: CatalogSnapshot,
+    step: str,
+    outcome_id: str,
+    base_id: Optional[str] = None,
+    botanical_ids: Sequence[str] = (),
+    sold_out: frozenset[str] = frozenset(),
+) -> dict:
+    outcome, base_id, botanical_ids = fragment_selection(
+        snapshot, step, outcome_id, base_id, botanical_ids
+    )
+    items = getattr(outcome, step)
+    if base_id is not None:
+        engine = snapshot.blend_engine.outcomes[outcome.id]
+        base = engine.base_positions[base_id]
+        if step == "botanicals":
+            options = engine.botanical_options(base)
+            positions = engine.botanical_positions
+        else:
+            botanicals = engine.botanical_mask(botanical_ids)
+            options = engine.flavor_options(base, botanicals)
+            positions = engine.flavor_positions
+        items = [item for item in items if options >> positions[item.id] & 1]
+
+    return {
+        "step": step,
+        "outcome": outcome,
+        "items": items,
+        "outcome_axes": snapshot.outcome_axes,
+        "flavor_categories": snapshot.flavor_categories,
+        "card_meters": snapshot.card_meters,
+        "sold_out": sold_out,
+    }
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Sequence
+
+from app.blend_engine import SCORE_MAX, BlendEngine, build_blend_engine
+from app.catalog_index import CatalogIndex, build_catalog_index
+from app.data import (
+    BLEND_OUTCOME_AXES,
+    CUSTOM_BLEND_OUTCOMES,
+    CUSTOM_BLEND_SIZES,
+    FLAVOR_CATEGORIES,
+    PRODUCTS,
+    BlendOutcome,
+    Product,
+    ProductSize,
+)
+from app.images import outcome_with_image_sources, with_image_sources
+from app.recommend import BlendRecommender, build_recommender
+from app.search import SearchIndex, build_search_index
+
+OUTCOME_AXIS_OVERRIDES = {"energy": "Alertness"}
+OUTCOME_BASE_LIMIT = 6
+METER_SCALE = 100 // SCORE_MAX
+
+CardMeters = Mapping[str, Mapping[str, tuple[tuple[str, int], ...]]]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: str
+    products: tuple[Product, ...]
+    outcomes: tuple[BlendOutcome, ...]
+    outcome_axes: tuple[str, ...]
+    flavor_categories: tuple[str, ...]
+    blend_sizes: tuple[ProductSize, ...]
+    index: CatalogIndex
+    blend_engine: BlendEngine
+    recommender: BlendRecommender
+    card_meters: CardMeters
+    search_index: SearchIndex
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+
+def build_blend_outcomes(
+    outcomes: Sequence[BlendOutcome] = CUSTOM_BLEND_OUTCOMES,
+) -> list[BlendOutcome]:
+    sorted_outcomes: list[BlendOutcome] = []
+    for outcome in outcomes:
+        axis = OUTCOME_AXIS_OVERRIDES.get(outcome.id, outcome.title)
+        sorted_bases = sorted(
+            outcome.bases,
+            key=lambda base: base.alignment.get(axis, 0),
+            reverse=True,
+        )
+        sorted_outcomes.append(
+            outcome.model_copy(update={"bases": sorted_bases[:OUTCOME_BASE_LIMIT]})
+        )
+    return sorted_outcomes
+
+
+def meter_widths(
+    values: Mapping[str, Optional[int]], labels: Sequence[str]
+) -> tuple[tuple[str, int], ...]:
+    return tuple((label, (values.get(label) or 0) * METER_SCALE) for label in labels)
+
+
+def build_card_meters(
+    outcomes: Sequence[BlendOutcome],
+    outcome_axes: Sequence[str],
+    flavor_categories: Sequence[str],
+) -> CardMeters:
+    bases = {}
+    botanicals = {}
+    flavors = {}
+    for outcome in outcomes:
+        for base in outcome.bases:
+            bases[base.id] = meter_widths(base.alignment, outcome_axes)
+        for botanical in outcome.botanicals:
+            botanicals[botanical.id] = meter_widths(
+                botanical.contributions, outcome_axes
+            )
+        for flavor in outcome.flavors:
+            flavors[flavor.id] = meter_widths(flavor.spectrum, flavor_categories)
+    return MappingProxyType(
+        {
+            "bases": MappingProxyType(bases),
+            "botanicals": MappingProxyType(botanicals),
+            "flavors": MappingProxyType(flavors),
+        }
+    )
+
+
+def catalog_version(
+    products: Sequence[Product],
+    outcomes: Sequence[BlendOutcome],
+    outcome_axes: Sequence[str],
+    flavor_categories: Sequence[str],
+    blend_sizes: Sequence[ProductSize],
+) -> str:
+    payload = {
+        "products": [product.model_dump() for product in products],
+        "outcomes": [outcome.model_dump() for outcome in outcomes],
+        "outcome_axes": list(outcome_axes),
+        "flavor_categories": list(flavor_categories),
+        "blend_sizes": [size.model_dump() for size in blend_sizes],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def build_snapshot(
+    products: Sequence[Product] = PRODUCTS,
+    outcomes: Sequence[BlendOutcome] = CUSTOM_BLEND_OUTCOMES,
+    outcome_axes: Sequence[str] = BLEND_OUTCOME_AXES,
+    flavor_categories: Sequence[str] = FLAVOR_CATEGORIES,
+    blend_sizes: Sequence[ProductSize] = CUSTOM_BLEND_SIZES,
+) -> CatalogSnapshot:
+    products = [with_image_sources(product) for product in products]
+    outcomes = [outcome_with_image_sources(outcome) for outcome in outcomes]
+    index = build_catalog_index(products, outcomes)
+    blend_engine = build_blend_engine(
+        outcomes, index, outcome_axes, flavor_categories, blend_sizes
+    )
+    return CatalogSnapshot(
+        version=catalog_version(
+            products, outcomes, outcome_axes, flavor_categories, blend_sizes
+        ),
+        products=tuple(products),
+        outcomes=tuple(build_blend_outcomes(outcomes)),
+        outcome_axes=tuple(outcome_axes),
+        flavor_categories=tuple(flavor_categories),
+        blend_sizes=tuple(blend_sizes),
+        index=index,
+        blend_engine=blend_engine,
+        recommender=build_recommender(
+            blend_engine,
+            {
+                outcome.id: OUTCOME_AXIS_OVERRIDES.get(outcome.id, outcome.title)
+                for outcome in outcomes
+            },
+        ),
+        card_meters=build_card_meters(outcomes, outcome_axes, flavor_categories),
+        search_index=build_search_index(products, outcomes, flavor_categories),
+    )
+
+
+_snapshot: CatalogSnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> CatalogSnapshot:
+    snapshot = _snapshot
+    if snapshot is None:
+        snapshot = refresh_snapshot()
+    return snapshot
+
+
+def install_snapshot(candidate: CatalogSnapshot) -> bool:
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot.version == candidate.version:
+            return False
+        _snapshot = candidate
+        return True
+
+
+def refresh_snapshot(**catalog: Sequence) -> CatalogSnapshot:
+    install_snapshot(build_snapshot(**catalog))
+    return get_snapshot()
+
+
+def get_product(product_id: str) -> Product | None:
+    return get_snapshot().index.products.get(product_id)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Optional, Sequence
+
+from pydantic import BaseModel
+
+from app.catalog import CatalogSnapshot
+from app.data import BlendOutcome, Product
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PRODUCT_PAGE_LIMIT = 20
+PRODUCT_PAGE_LIMIT_MAX = 100
+PRODUCT_FIELDS = frozenset(Product.model_fields)
+OUTCOME_FIELDS = frozenset(BlendOutcome.model_fields)
+CATALOG_SECTIONS = frozenset(
+    {"products", "outcomes", "outcome_axes", "flavor_categories", "blend_sizes"}
+)
+
+
+class CatalogQueryError(ValueError):
+    pass
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def parse_fields(
+    fields: Optional[str], allowed: frozenset[str]
+) -> Optional[tuple[str, ...]]:
+    if not fields:
+        return None
+    names = tuple(sorted({name.strip() for name in fields.split(",") if name.strip()}))
+    unknown = sorted(set(names) - allowed)
+    if unknown:
+        raise CatalogQueryError(f"Unknown fields: {', '.join(unknown)}")
+    return names or None
+
+
+def project(item: BaseModel, fields: Optional[tuple[str, ...]]) -> dict:
+    if fields is None:
+        return item.model_dump(mode="json")
+    return item.model_dump(mode="json", include=set(fields))
+
+
+def encode_cursor(product_id: str) -> str:
+    return base64.urlsafe_b64encode(product_id.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise CatalogQueryError("Invalid cursor.") from error
+
+
+def page_start(products: Sequence[Product], cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    product_id = decode_cursor(cursor)
+    for position, product in enumerate(products):
+        if product.id == product_id:
+            return position + 1
+    raise CatalogQueryError("Cursor does not match the current catalog.")
+
+
+def product_page(
+    snapshot: CatalogSnapshot,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = PRODUCT_PAGE_LIMIT,
+) -> bytes:
+    if not 1 <= limit <= PRODUCT_PAGE_LIMIT_MAX:
+        raise CatalogQueryError(
+            f"limit must be between 1 and {PRODUCT_PAGE_LIMIT_MAX}."
+        )
+    projection = parse_fields(fields, PRODUCT_FIELDS)
+    start = page_start(snapshot.products, cursor)
+    page = snapshot.products[start : start + limit]
+    has_more = start + limit < len(snapshot.products)
+    return dumps(
+        {
+            "version": snapshot.version,
+            "items": [project(product, projection) for product in page],
+            "next_cursor": encode_cursor(page[-1].id) if page and has_more else None,
+        }
+    )
+
+
+def find_outcome(snapshot: CatalogSnapshot, outcome_id: str) -> Optional[BlendOutcome]:
+    return next(
+        (outcome for outcome in snapshot.outcomes if outcome.id == outcome_id), None
+    )
+
+
+def outcome_document(
+    snapshot: CatalogSnapshot, outcome: BlendOutcome, fields: Optional[str] = None
+) -> bytes:
+    projection = parse_fields(fields, OUTCOME_FIELDS)
+    return dumps({"version": snapshot.version, **project(outcome, projection)})
+
+
+def catalog_document(snapshot: CatalogSnapshot, fields: Optional[str] = None) -> bytes:
+    sections = parse_fields(fields, CATALOG_SECTIONS) or tuple(sorted(CATALOG_SECTIONS))
+    values = {
+        "products": lambda: [project(item, None) for item in snapshot.products],
+        "outcomes": lambda: [project(item, None) for item in snapshot.outcomes],
+        "outcome_axes": lambda: list(snapshot.outcome_axes),
+        "flavor_categories": lambda: list(snapshot.flavor_categories),
+        "blend_sizes": lambda: [project(item, None) for item in snapshot.blend_sizes],
+    }
+    return dumps(
+        {"version": snapshot.version, **{name: values[name]() for name in sections}}
+    )
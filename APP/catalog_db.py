@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.data import (
+    CUSTOM_BLEND_OUTCOMES,
+    CUSTOM_BLEND_SIZES,
+    PRODUCTS,
+    BlendBase,
+    BlendBotanical,
+    BlendFlavor,
+    BlendOutcome,
+    Product,
+    ProductSize,
+)
+from app.models import (
+    BlendBaseRecord,
+    BlendBotanicalRecord,
+    BlendFlavorRecord,
+    BlendOutcomeRecord,
+    BlendSizeRecord,
+    ProductRecord,
+    ProductSizeRecord,
+    botanical_bases,
+    flavor_bases,
+    flavor_botanicals,
+    flavor_incompatibilities,
+)
+
+CATALOG_TABLES = (
+    flavor_incompatibilities,
+    flavor_botanicals,
+    flavor_bases,
+    botanical_bases,
+    BlendFlavorRecord,
+    BlendBotanicalRecord,
+    BlendBaseRecord,
+    BlendOutcomeRecord,
+    BlendSizeRecord,
+    ProductSizeRecord,
+    ProductRecord,
+)
+PRODUCT_OPTIONS = (selectinload(ProductRecord.sizes),)
+OUTCOME_OPTIONS = (
+    selectinload(BlendOutcomeRecord.bases),
+    selectinload(BlendOutcomeRecord.botanicals).selectinload(BlendBotanicalRecord.bases),
+    selectinload(BlendOutcomeRecord.flavors).options(
+        selectinload(BlendFlavorRecord.bases),
+        selectinload(BlendFlavorRecord.botanicals),
+        selectinload(BlendFlavorRecord.incompatible_with),
+    ),
+)
+
+
+def product_from_record(record: ProductRecord) -> Product:
+    return Product(
+        id=record.id,
+        name=record.name,
+        description=record.description,
+        outcomes=record.outcomes,
+        sizes=[
+            ProductSize(label=size.label, grams=size.grams, price_aud=size.price_aud)
+            for size in record.sizes
+        ],
+        image=record.image,
+        image_alt=record.image_alt,
+    )
+
+
+def outcome_from_record(record: BlendOutcomeRecord) -> BlendOutcome:
+    return BlendOutcome(
+        id=record.id,
+        title=record.title,
+        description=record.description,
+        bases=[
+            BlendBase(
+                id=base.id,
+                title=base.title,
+                description=base.description,
+                alignment=base.alignment,
+                image=base.image,
+                image_alt=base.image_alt,
+            )
+            for base in record.bases
+        ],
+        botanicals=[
+            BlendBotanical(
+                id=botanical.id,
+                title=botanical.title,
+                attributes=botanical.attributes,
+                contributions=botanical.contributions,
+                base_ids=[base.id for base in botanical.bases],
+                image=botanical.image,
+                image_alt=botanical.image_alt,
+            )
+            for botanical in record.botanicals
+        ],
+        flavors=[
+            BlendFlavor(
+                id=flavor.id,
+                title=flavor.title,
+                category=flavor.category,
+                notes=flavor.notes,
+                spectrum=flavor.spectrum,
+                base_ids=[base.id for base in flavor.bases],
+                botanical_ids=[botanical.id for botanical in flavor.botanicals],
+                incompatible_with=[other.id for other in flavor.incompatible_with],
+                image=flavor.image,
+                image_alt=flavor.image_alt,
+            )
+            for flavor in record.flavors
+        ],
+    )
+
+
+def catalog_statements() -> tuple:
+    return (
+        select(ProductRecord).options(*PRODUCT_OPTIONS).order_by(ProductRecord.position),
+        select(BlendOutcomeRecord)
+        .options(*OUTCOME_OPTIONS)
+        .order_by(BlendOutcomeRecord.position),
+        select(BlendSizeRecord).order_by(BlendSizeRecord.position),
+    )
+
+
+def catalog_from_records(
+    products: Sequence[ProductRecord],
+    outcomes: Sequence[BlendOutcomeRecord],
+    blend_sizes: Sequence[BlendSizeRecord],
+) -> dict:
+    return {
+        "products": [product_from_record(record) for record in products],
+        "outcomes": [outcome_from_record(record) for record in outcomes],
+        "blend_sizes": [
+            ProductSize(label=size.label, grams=size.grams, price_aud=size.price_aud)
+            for size in blend_sizes
+        ],
+    }
+
+
+def load_catalog(db: Session) -> dict:
+    return catalog_from_records(
+        *(db.scalars(statement).all() for statement in catalog_statements())
+    )
+
+
+async def load_catalog_async(db: AsyncSession) -> dict:
+    records = [
+        (await db.scalars(statement)).all() for statement in catalog_statements()
+    ]
+    return catalog_from_records(*records)
+
+
+def _rows(entries: Sequence[tuple[str, Sequence[str]]], left: str, right: str) -> list:
+    return [
+        {left: item_id, right: linked_id, "position": position}
+        for item_id, linked_ids in entries
+        for position, linked_id in enumerate(linked_ids)
+    ]
+
+
+def _insert(db: Session, target, rows: list) -> None:
+    if rows:
+        db.execute(insert(target), rows)
+
+
+def seed_catalog(
+    db: Session,
+    products: Sequence[Product] = PRODUCTS,
+    outcomes: Sequence[BlendOutcome] = CUSTOM_BLEND_OUTCOMES,
+    blend_sizes: Sequence[ProductSize] = CUSTOM_BLEND_SIZES,
+) -> None:
+    for target in CATALOG_TABLES:
+        db.execute(delete(target))
+
+    _insert(
+        db,
+        ProductRecord,
+        [
+            {
+                "id": product.id,
+                "position": position,
+                "name": product.name,
+                "description": product.description,
+                "outcomes": list(product.outcomes),
+                "image": product.image,
+                "image_alt": product.image_alt,
+            }
+            for position, product in enumerate(products)
+        ],
+    )
+    _insert(
+        db,
+        ProductSizeRecord,
+        [
+            {"product_id": product.id, "position": position, **size.model_dump()}
+            for product in products
+            for position, size in enumerate(product.sizes)
+        ],
+    )
+    _insert(
+        db,
+        BlendSizeRecord,
+        [
+            {"position": position, **size.model_dump()}
+            for position, size in enumerate(blend_sizes)
+        ],
+    )
+    _insert(
+        db,
+        BlendOutcomeRecord,
+        [
+            {
+                "id": outcome.id,
+                "position": position,
+                "title": outcome.title,
+                "description": outcome.description,
+            }
+            for position, outcome in enumerate(outcomes)
+        ],
+    )
+    _insert(
+        db,
+        BlendBaseRecord,
+        [
+            {"outcome_id": outcome.id, "position": position, **base.model_dump()}
+            for outcome in outcomes
+            for position, base in enumerate(outcome.bases)
+        ],
+    )
+    _insert(
+        db,
+        BlendBotanicalRecord,
+        [
+            {
+                "outcome_id": outcome.id,
+                "position": position,
+                **botanical.model_dump(exclude={"base_ids"}),
+            }
+            for outcome in outcomes
+            for position, botanical in enumerate(outcome.botanicals)
+        ],
+    )
+    _insert(
+        db,
+        BlendFlavorRecord,
+        [
+            {
+                "outcome_id": outcome.id,
+                "position": position,
+                **flavor.model_dump(
+                    exclude={"base_ids", "botanical_ids", "incompatible_with"}
+                ),
+            }
+            for outcome in outcomes
+            for position, flavor in enumerate(outcome.flavors)
+        ],
+    )
+
+    botanicals = [botanical for outcome in outcomes for botanical in outcome.botanicals]
+    flavors = [flavor for outcome in outcomes for flavor in outcome.flavors]
+    _insert(
+        db,
+        botanical_bases,
+        _rows([(item.id, item.base_ids) for item in botanicals], "botanical_id", "base_id"),
+    )
+    _insert(
+        db,
+        flavor_bases,
+        _rows([(item.id, item.base_ids) for item in flavors], "flavor_id", "base_id"),
+    )
+    _insert(
+        db,
+        flavor_botanicals,
+        _rows(
+            [(item.id, item.botanical_ids) for item in flavors],
+            "flavor_id",
+            "botanical_id",
+        ),
+    )
+    _insert(
+        db,
+        flavor_incompatibilities,
+        _rows(
+            [(item.id, item.incompatible_with) for item in flavors],
+            "flavor_id",
+            "incompatible_id",
+        ),
+    )
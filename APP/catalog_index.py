@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Mapping, Sequence
+
+if TYPE_CHECKING:
+    from app.data import (
+        BlendBase,
+        BlendBotanical,
+        BlendFlavor,
+        BlendOutcome,
+        Product,
+    )
+
+
+@dataclass(frozen=True)
+class CatalogIndex:
+    products: Mapping[str, Product]
+    outcomes: Mapping[str, BlendOutcome]
+    bases: Mapping[str, BlendBase]
+    botanicals: Mapping[str, BlendBotanical]
+    flavors: Mapping[str, BlendFlavor]
+    outcome_by_ingredient: Mapping[str, str]
+    base_botanicals: Mapping[str, frozenset[str]]
+    base_flavors: Mapping[str, frozenset[str]]
+    botanical_flavors: Mapping[str, frozenset[str]]
+    flavor_incompatible: Mapping[str, frozenset[str]]
+
+
+def _index_by_id(items: Iterable, kind: str) -> dict:
+    indexed: dict = {}
+    for item in items:
+        if item.id in indexed:
+            raise ValueError(f"Duplicate {kind} id: {item.id}")
+        indexed[item.id] = item
+    return indexed
+
+
+def _freeze(
+    links: Mapping[str, set[str]], keys: Iterable[str]
+) -> Mapping[str, frozenset[str]]:
+    return MappingProxyType({key: frozenset(links.get(key, ())) for key in keys})
+
+
+def build_catalog_index(
+    products: Sequence[Product], outcomes: Sequence[BlendOutcome]
+) -> CatalogIndex:
+    bases = _index_by_id((base for outcome in outcomes for base in outcome.bases), "base")
+    botanicals = _index_by_id(
+        (botanical for outcome in outcomes for botanical in outcome.botanicals),
+        "botanical",
+    )
+    flavors = _index_by_id(
+        (flavor for outcome in outcomes for flavor in outcome.flavors), "flavor"
+    )
+
+    outcome_by_ingredient: dict[str, str] = {}
+    base_botanicals: dict[str, set[str]] = defaultdict(set)
+    base_flavors: dict[str, set[str]] = defaultdict(set)
+    botanical_flavors: dict[str, set[str]] = defaultdict(set)
+    flavor_incompatible: dict[str, set[str]] = defaultdict(set)
+
+    for outcome in outcomes:
+        outcome_base_ids = [base.id for base in outcome.bases]
+        for item in (*outcome.bases, *outcome.botanicals, *outcome.flavors):
+            outcome_by_ingredient[item.id] = outcome.id
+
+        for botanical in outcome.botanicals:
+            for base_id in botanical.base_ids or outcome_base_ids:
+                base_botanicals[base_id].add(botanical.id)
+
+        for flavor in outcome.flavors:
+            for base_id in flavor.base_ids or outcome_base_ids:
+                base_flavors[base_id].add(flavor.id)
+            for botanical_id in flavor.botanical_ids:
+                botanical_flavors[botanical_id].add(flavor.id)
+            for other_id in flavor.incompatible_with:
+                flavor_incompatible[flavor.id].add(other_id)
+                flavor_incompatible[other_id].add(flavor.id)
+
+    return CatalogIndex(
+        products=MappingProxyType(_index_by_id(products, "product")),
+        outcomes=MappingProxyType(_index_by_id(outcomes, "outcome")),
+        bases=MappingProxyType(bases),
+        botanicals=MappingProxyType(botanicals),
+        flavors=MappingProxyType(flavors),
+        outcome_by_ingredient=MappingProxyType(outcome_by_ingredient),
+        base_botanicals=_freeze(base_botanicals, bases),
+        base_flavors=_freeze(base_flavors, bases),
+        botanical_flavors=_freeze(botanical_flavors, botanicals),
+        flavor_incompatible=_freeze(flavor_incompatible, flavors),
+    )
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.catalog import (
+    CatalogSnapshot,
+    build_snapshot,
+    get_snapshot,
+    install_snapshot,
+)
+from app.data import (
+    BLEND_OUTCOME_AXES,
+    CUSTOM_BLEND_OUTCOMES,
+    CUSTOM_BLEND_SIZES,
+    FLAVOR_CATEGORIES,
+    PRODUCTS,
+    BlendOutcome,
+    Product,
+    ProductSize,
+)
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SOURCE = os.getenv("CATALOG_SOURCE", "module")
+CATALOG_FILE = os.getenv("CATALOG_FILE", "catalog.json")
+CATALOG_RELOAD_SECONDS = float(os.getenv("CATALOG_RELOAD_SECONDS", "0"))
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class CatalogDocument(BaseModel):
+    products: List[Product]
+    outcomes: List[BlendOutcome]
+    blend_sizes: List[ProductSize]
+    outcome_axes: List[str] = BLEND_OUTCOME_AXES
+    flavor_categories: List[str] = FLAVOR_CATEGORIES
+
+
+def validate_catalog(catalog: dict) -> None:
+    problems: list[str] = []
+    if not catalog.get("blend_sizes"):
+        problems.append("Catalog has no blend sizes.")
+    for product in catalog.get("products", []):
+        if not product.sizes:
+            problems.append(f"Product {product.id} has no sizes.")
+    for outcome in catalog.get("outcomes", []):
+        base_ids = {base.id for base in outcome.bases}
+        botanical_ids = {botanical.id for botanical in outcome.botanicals}
+        flavor_ids = {flavor.id for flavor in outcome.flavors}
+        for botanical in outcome.botanicals:
+            for base_id in set(botanical.base_ids) - base_ids:
+                problems.append(
+                    f"Botanical {botanical.id} references unknown base {base_id}."
+                )
+        for flavor in outcome.flavors:
+            for base_id in set(flavor.base_ids) - base_ids:
+                problems.append(
+                    f"Flavor {flavor.id} references unknown base {base_id}."
+                )
+            for botanical_id in set(flavor.botanical_ids) - botanical_ids:
+                problems.append(
+                    f"Flavor {flavor.id} references unknown botanical {botanical_id}."
+                )
+            for other_id in set(flavor.incompatible_with) - flavor_ids:
+                problems.append(
+                    f"Flavor {flavor.id} is incompatible with unknown flavor {other_id}."
+                )
+    if problems:
+        raise CatalogError(" ".join(problems))
+
+
+def read_catalog_file(path: str | Path) -> dict:
+    document = CatalogDocument.model_validate_json(Path(path).read_bytes())
+    return {
+        "products": document.products,
+        "outcomes": document.outcomes,
+        "blend_sizes": document.blend_sizes,
+        "outcome_axes": document.outcome_axes,
+        "flavor_categories": document.flavor_categories,
+    }
+
+
+def write_catalog_file(
+    path: str | Path, snapshot: CatalogSnapshot | None = None
+) -> None:
+    snapshot = snapshot or build_snapshot()
+    document = CatalogDocument(
+        products=list(snapshot.products),
+        outcomes=list(snapshot.index.outcomes.values()),
+        blend_sizes=list(snapshot.blend_sizes),
+        outcome_axes=list(snapshot.outcome_axes),
+        flavor_categories=list(snapshot.flavor_categories),
+    )
+    Path(path).write_text(document.model_dump_json(indent=2))
+
+
+async def load_from_database() -> dict:
+    from app.catalog_db import load_catalog_async
+    from app.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        return await load_catalog_async(db)
+
+
+def file_loader(path: str | Path) -> Callable[[], Awaitable[Optional[dict]]]:
+    last_modified: list[float] = []
+
+    async def load() -> Optional[dict]:
+        modified = os.stat(path).st_mtime
+        if last_modified and last_modified[0] == modified:
+            return None
+        catalog = await asyncio.to_thread(read_catalog_file, path)
+        last_modified[:] = [modified]
+        return catalog
+
+    return load
+
+
+async def load_from_module() -> dict:
+    return {
+        "products": PRODUCTS,
+        "outcomes": CUSTOM_BLEND_OUTCOMES,
+        "blend_sizes": CUSTOM_BLEND_SIZES,
+        "outcome_axes": BLEND_OUTCOME_AXES,
+        "flavor_categories": FLAVOR_CATEGORIES,
+    }
+
+
+def catalog_loader(
+    source: str = CATALOG_SOURCE,
+) -> Callable[[], Awaitable[Optional[dict]]]:
+    if source == "database":
+        return load_from_database
+    if source == "file":
+        return file_loader(CATALOG_FILE)
+    if source == "module":
+        return load_from_module
+    raise CatalogError(f"Unknown catalog source: {source}")
+
+
+class CatalogReloader:
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[Optional[dict]]],
+        interval: float = CATALOG_RELOAD_SECONDS,
+        on_swap: Optional[Callable[[CatalogSnapshot], None]] = None,
+    ) -> None:
+        self.load = load
+        self.interval = interval
+        self.on_swap = on_swap
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def reload(self) -> CatalogSnapshot:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            try:
+                catalog = await self.load()
+                if catalog is None:
+                    return get_snapshot()
+                validate_catalog(catalog)
+                candidate = await asyncio.to_thread(build_snapshot, **catalog)
+            except (ValueError, OSError, SQLAlchemyError) as error:
+                self.failures += 1
+                self.last_error = str(error)
+                raise CatalogError(str(error)) from error
+            self.last_error = None
+            if install_snapshot(candidate):
+                self.reloads += 1
+                logger.info("Catalog swapped to version %s", candidate.version)
+                if self.on_swap is not None:
+                    self.on_swap(candidate)
+            return get_snapshot()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reload()
+            except CatalogError as error:
+                logger.warning("Rejected catalog update, keeping current version: %s", error)
+            except Exception as error:
+                self.failures += 1
+                self.last_error = str(error)
+                logger.exception("Catalog reload failed; keeping current version")
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return {
+            "version": get_snapshot().version,
+            "source": CATALOG_SOURCE,
+            "interval_seconds": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    write_catalog_file(sys.argv[1] if len(sys.argv) > 1 else CATALOG_FILE)
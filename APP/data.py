@@ -5,6 +5,11 @@ from typing import List
 from pydantic import BaseModel
 
 
+class ImageSource(BaseModel):
+    type: str
+    srcset: str
+
+
 class ProductSize(BaseModel):
     label: str
     grams: int
@@ -19,6 +24,7 @@ class Product(BaseModel):
     sizes: List[ProductSize]
     image: str
     image_alt: str
+    image_sources: List[ImageSource] = []
 
 
 class BlendBase(BaseModel):
@@ -28,6 +34,7 @@ class BlendBase(BaseModel):
     alignment: dict[str, int]
     image: str
     image_alt: str
+    image_sources: List[ImageSource] = []
 
 
 class BlendFlavor(BaseModel):
@@ -41,6 +48,7 @@ class BlendFlavor(BaseModel):
     incompatible_with: List[str]
     image: str
     image_alt: str
+    image_sources: List[ImageSource] = []
 
 
 class BlendOutcome(BaseModel):
@@ -60,6 +68,7 @@ class BlendBotanical(BaseModel):
     base_ids: List[str]
     image: str
     image_alt: str
+    image_sources: List[ImageSource] = []
 
 
 PLACEHOLDER_IMAGE_PATH = "/static/tea-leaves-placeholder.png"
@@ -121,8 +130,28 @@ def build_flavor(
     )
 
 
+def build_product(
+    *,
+    id: str,
+    name: str,
+    description: str,
+    outcomes: List[str],
+    sizes: List[ProductSize],
+) -> Product:
+    image, image_alt = get_product_image(id)
+    return Product(
+        id=id,
+        name=name,
+        description=description,
+        outcomes=outcomes,
+        sizes=sizes,
+        image=image,
+        image_alt=image_alt,
+    )
+
+
 PRODUCTS: List[Product] = [
-    Product(
+    build_product(
         id="solstice-rest",
         name="Solstice Rest",
         description="A dreamy evening blend with rooibos, vanilla, and chamomile for winding down.",
@@ -131,10 +160,8 @@ PRODUCTS: List[Product] = [
             ProductSize(label="50g", grams=50, price_aud=18.0),
             ProductSize(label="100g", grams=100, price_aud=32.0),
         ],
-        image=get_product_image("solstice-rest")[0],
-        image_alt=get_product_image("solstice-rest")[1],
     ),
-    Product(
+    build_product(
         id="coastal-focus",
         name="Coastal Focus",
         description="Bright sencha, lemon myrtle, and ginkgo to keep the mind clear and steady.",
@@ -143,10 +170,8 @@ PRODUCTS: List[Product] = [
             ProductSize(label="50g", grams=50, price_aud=20.0),
             ProductSize(label="100g", grams=100, price_aud=36.0),
         ],
-        image=get_product_image("coastal-focus")[0],
-        image_alt=get_product_image("coastal-focus")[1],
     ),
-    Product(
+    build_product(
         id="morning-spark",
         name="Morning Spark",
         description="A lively black tea base with cacao nibs and orange peel for uplifting energy.",
@@ -155,10 +180,8 @@ PRODUCTS: List[Product] = [
             ProductSize(label="50g", grams=50, price_aud=19.0),
             ProductSize(label="100g", grams=100, price_aud=34.0),
         ],
-        image=get_product_image("morning-spark")[0],
-        image_alt=get_product_image("morning-spark")[1],
     ),
-    Product(
+    build_product(
         id="quiet-glow",
         name="Quiet Glow",
         description="White tea with lavender and rose petals for a soft, soothing glow.",
@@ -167,8 +190,6 @@ PRODUCTS: List[Product] = [
             ProductSize(label="50g", grams=50, price_aud=21.0),
             ProductSize(label="100g", grams=100, price_aud=38.0),
         ],
-        image=get_product_image("quiet-glow")[0],
-        image_alt=get_product_image("quiet-glow")[1],
     ),
 ]
 
@@ -606,10 +627,3 @@ CUSTOM_BLEND_OUTCOMES: List[BlendOutcome] = [
         ],
     ),
 ]
-
-
-def get_product(product_id: str) -> Product | None:
-    for product in PRODUCTS:
-        if product.id == product_id:
-            return product
-    return None
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db import async_engine
+from app.metrics import CollectedMetric, Counter, Histogram, registry
+from app.models import EventRecord
+
+logger = logging.getLogger(__name__)
+
+EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "1") == "1"
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "10000"))
+EVENTS_BATCH_SIZE = int(os.getenv("EVENTS_BATCH_SIZE", "500"))
+EVENTS_FLUSH_SECONDS = float(os.getenv("EVENTS_FLUSH_SECONDS", "2"))
+EVENTS_FLUSH_TIMEOUT = float(os.getenv("EVENTS_FLUSH_TIMEOUT", "5"))
+EVENTS_SHUTDOWN_SECONDS = float(os.getenv("EVENTS_SHUTDOWN_SECONDS", "10"))
+EVENTS_PER_REQUEST = 50
+
+EventName = Literal[
+    "step_view",
+    "step_complete",
+    "cart_view",
+    "cart_checkout",
+    "checkout_view",
+    "order_submit",
+]
+PropertyValue = Union[str, int, float, bool, None]
+
+
+class Event(BaseModel):
+    name: EventName
+    step: Optional[int] = Field(default=None, ge=1, le=4)
+    path: Optional[str] = Field(default=None, max_length=255)
+    properties: Optional[Dict[str, PropertyValue]] = Field(default=None, max_length=16)
+
+
+class EventBatch(BaseModel):
+    events: List[Event] = Field(min_length=1, max_length=EVENTS_PER_REQUEST)
+
+
+def visitor_id(session_id: Optional[str]) -> Optional[str]:
+    if session_id is None:
+        return None
+    return hashlib.sha256(session_id.encode()).hexdigest()[:32]
+
+
+ACCEPTED = registry.register(
+    Counter("analytics_events_accepted_total", "Events queued for the database.")
+)
+DROPPED = registry.register(
+    Counter(
+        "analytics_events_dropped_total",
+        "Events discarded instead of blocking requests.",
+        ("reason",),
+    )
+)
+WRITTEN = registry.register(
+    Counter("analytics_events_written_total", "Events written to the database.")
+)
+FLUSH_SECONDS = registry.register(
+    Histogram("analytics_flush_seconds", "Time spent writing one event batch.")
+)
+
+
+class EventSink:
+    def __init__(
+        self,
+        engine: AsyncEngine = async_engine,
+        max_queued: int = EVENTS_QUEUE_SIZE,
+        batch_size: int = EVENTS_BATCH_SIZE,
+        interval: float = EVENTS_FLUSH_SECONDS,
+        timeout: float = EVENTS_FLUSH_TIMEOUT,
+        shutdown_timeout: float = EVENTS_SHUTDOWN_SECONDS,
+        enabled: bool = EVENTS_ENABLED,
+    ) -> None:
+        self.engine = engine
+        self.max_queued = max_queued
+        self.batch_size = max(batch_size, 1)
+        self.interval = interval
+        self.timeout = timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.enabled = enabled
+        self.flushes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._flushing = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def enqueue(self, events: List[Event], session_id: Optional[str]) -> int:
+        if self._queue is None or self._stopping:
+            DROPPED.inc("not_running", amount=len(events))
+            return 0
+        received_at = datetime.now(timezone.utc)
+        visitor = visitor_id(session_id)
+        accepted = 0
+        for event in events:
+            try:
+                self._queue.put_nowait(
+                    {
+                        "received_at": received_at,
+                        "name": event.name,
+                        "step": event.step,
+                        "visitor": visitor,
+                        "path": event.path,
+                        "properties": event.properties,
+                    }
+                )
+            except asyncio.QueueFull:
+                DROPPED.inc("queue_full", amount=len(events) - accepted)
+                break
+            accepted += 1
+        if accepted:
+            ACCEPTED.inc(amount=accepted)
+            self._wakeup.set()
+        return accepted
+
+    async def next_batch(self) -> list[dict]:
+        batch: list[dict] = []
+        deadline = None
+        while True:
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if len(batch) >= self.batch_size or self._stopping:
+                return batch
+            if batch and deadline is None:
+                deadline = time.monotonic() + self.interval
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                return batch
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def write(self, batch: list[dict]) -> None:
+        async with self.engine.begin() as connection:
+            await connection.execute(insert(EventRecord), batch)
+
+    async def flush(self, batch: list[dict]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.write(batch), self.timeout)
+        except asyncio.TimeoutError:
+            self.failed("sink_timeout", len(batch), "Timed out writing events")
+            return
+        except (OSError, SQLAlchemyError) as error:
+            self.failed("sink_error", len(batch), str(getattr(error, "orig", error)))
+            return
+        finally:
+            FLUSH_SECONDS.observe(time.perf_counter() - started)
+        self.flushes += 1
+        self.last_error = None
+        WRITTEN.inc(amount=len(batch))
+
+    def failed(self, reason: str, count: int, error: str) -> None:
+        self.failures += 1
+        self.last_error = error
+        DROPPED.inc(reason, amount=count)
+        logger.warning("Dropped %d analytics events: %s", count, error)
+
+    async def run(self) -> None:
+        while True:
+            batch = await self.next_batch()
+            if batch:
+                self._flushing = len(batch)
+                try:
+                    await self.flush(batch)
+                except Exception as error:
+                    self.failed("sink_error", len(batch), str(error))
+                    logger.exception("Analytics flush failed")
+                self._flushing = 0
+            if self._stopping and self._queue.empty():
+                return
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._queue = asyncio.Queue(self.max_queued)
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._flushing = 0
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            self.failed(
+                "shutdown",
+                self._flushing + self.queued,
+                f"Gave up draining after {self.shutdown_timeout:g}s",
+            )
+        self._task = None
+        self._queue = None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "batch_size": self.batch_size,
+            "interval_seconds": self.interval,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+event_sink = EventSink()
+
+registry.register(
+    CollectedMetric(
+        "analytics_events_queued",
+        "Events waiting to be written to the database.",
+        "gauge",
+        (),
+        lambda: {(): float(event_sink.queued)},
+    )
+)
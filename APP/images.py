@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+from typing import Iterable, List, TypeVar
+
+from app.assets import ASSETS_DIR, ASSETS_URL, STATIC_DIR, fingerprint, static_name
+from app.data import BlendOutcome, ImageSource
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+    features = None
+
+IMAGE_WIDTHS = (160, 320, 480, 640, 960)
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+IMAGE_FORMATS = (
+    ("avif", "image/avif", {"quality": 55}),
+    ("webp", "image/webp", {"quality": 78, "method": 6}),
+)
+IMAGES_MANIFEST = "images.json"
+
+ImageItem = TypeVar("ImageItem")
+
+
+def image_formats() -> list[tuple[str, str, dict]]:
+    if Image is None:
+        return []
+    return [entry for entry in IMAGE_FORMATS if features.check(entry[0])]
+
+
+def derivative_widths(width: int) -> list[int]:
+    return [candidate for candidate in IMAGE_WIDTHS if candidate < width] or [width]
+
+
+def encode(image, extension: str, options: dict) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=extension.upper(), **options)
+    return buffer.getvalue()
+
+
+def build_derivatives(name: str, source: Path, public: Path) -> list[dict]:
+    stem = name.rpartition(".")[0]
+    with Image.open(source / name) as original:
+        original.load()
+        widths = derivative_widths(original.width)
+        sources = []
+        for extension, media_type, options in image_formats():
+            candidates = []
+            for width in widths:
+                height = round(original.height * width / original.width)
+                resized = original.resize((width, height), Image.Resampling.LANCZOS)
+                content = encode(resized, extension, options)
+                hashed = fingerprint(f"{stem}-{width}w.{extension}", content)
+                (public / hashed).write_bytes(content)
+                candidates.append((f"{ASSETS_URL}/{hashed}", width, len(content)))
+            sources.append({"type": media_type, "candidates": candidates})
+    return sources
+
+
+def build_images(
+    names: Iterable[str],
+    source: Path = STATIC_DIR,
+    output: Path = ASSETS_DIR,
+) -> dict[str, list[dict]]:
+    if Image is None:
+        return {}
+    manifest = {
+        name: build_derivatives(name, source, output / "static")
+        for name in sorted(names)
+        if Path(name).suffix.lower() in IMAGE_SUFFIXES
+    }
+    (output / IMAGES_MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def read_image_manifest(directory: Path = ASSETS_DIR) -> dict[str, List[ImageSource]]:
+    path = directory / IMAGES_MANIFEST
+    if not path.is_file():
+        return {}
+    return {
+        name: [
+            ImageSource(
+                type=entry["type"],
+                srcset=", ".join(
+                    f"{url} {width}w" for url, width, _ in entry["candidates"]
+                ),
+            )
+            for entry in entries
+        ]
+        for name, entries in json.loads(path.read_text()).items()
+    }
+
+
+IMAGE_SOURCES = read_image_manifest()
+
+
+def with_image_sources(item: ImageItem) -> ImageItem:
+    sources = IMAGE_SOURCES.get(static_name(item.image) or "")
+    if not sources:
+        return item
+    return item.model_copy(update={"image_sources": sources})
+
+
+def outcome_with_image_sources(outcome: BlendOutcome) -> BlendOutcome:
+    return outcome.model_copy(
+        update={
+            "bases": [with_image_sources(base) for base in outcome.bases],
+            "botanicals": [with_image_sources(item) for item in outcome.botanicals],
+            "flavors": [with_image_sources(flavor) for flavor in outcome.flavors],
+        }
+    )
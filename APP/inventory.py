@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import Counter
+from typing import Callable, Iterable, Mapping, Optional, Sequence
+
+from sqlalchemy import case, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.blend_engine import BOTANICAL_MAX, FLAVOR_MAX
+from app.catalog import CatalogSnapshot
+from app.data import BlendOutcome, Product, ProductSize
+from app.db import AsyncSessionLocal
+from app.models import InventoryRecord
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_CACHE_SECONDS = float(os.getenv("INVENTORY_CACHE_SECONDS", "5"))
+INVENTORY_SEED_GRAMS = int(os.getenv("INVENTORY_SEED_GRAMS", "5000"))
+BLEND_BASE_SHARE = float(os.getenv("BLEND_BASE_SHARE", "0.6"))
+STOCK_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+class StockError(Exception):
+    def __init__(self, skus: Sequence[str], status_code: int = 409) -> None:
+        super().__init__(
+            "Not enough stock for: "
+            + ", ".join(key.partition(":")[2] for key in skus)
+            + "."
+        )
+        self.skus = list(skus)
+        self.status_code = status_code
+
+
+def sku(kind: str, item_id: str) -> str:
+    return f"{kind}:{item_id}"
+
+
+def blend_portions(
+    grams: int, base_id: str, addin_skus: Sequence[str]
+) -> dict[str, int]:
+    if not addin_skus:
+        return {sku("base", base_id): grams}
+    each = int(grams * (1 - BLEND_BASE_SHARE)) // len(addin_skus)
+    portions = {sku("base", base_id): grams - each * len(addin_skus)}
+    for addin in addin_skus:
+        portions[addin] = each
+    return portions
+
+
+def reservation_grams(lines: Iterable[dict]) -> dict[str, int]:
+    demand: Counter[str] = Counter()
+    for line in lines:
+        quantity = line["quantity"]
+        if line["kind"] == "product":
+            demand[sku("product", line["product_id"])] += line["grams"] * quantity
+            continue
+        details = line["details"]
+        addins = [
+            *(sku("botanical", item_id) for item_id in details["botanical_ids"]),
+            *(sku("flavor", item_id) for item_id in details["flavor_ids"]),
+        ]
+        portions = blend_portions(
+            line["grams"], details["base_id"], list(dict.fromkeys(addins))
+        )
+        for key, grams in portions.items():
+            demand[key] += grams * quantity
+    return {key: grams for key, grams in sorted(demand.items()) if grams > 0}
+
+
+def minimum_portions(blend_sizes: Sequence[ProductSize]) -> dict[str, int]:
+    smallest = min((size.grams for size in blend_sizes), default=0)
+    addins = [f"addin:{slot}" for slot in range(BOTANICAL_MAX + FLAVOR_MAX)]
+    portions = blend_portions(smallest, "", addins)
+    return {
+        "base": portions[sku("base", "")],
+        "botanical": portions[addins[0]],
+        "flavor": portions[addins[0]],
+    }
+
+
+async def reserve_stock(db: AsyncSession, demand: Mapping[str, int]) -> dict[str, int]:
+    if not demand:
+        return {}
+    grams = case(demand, value=InventoryRecord.sku)
+    locked = (
+        select(InventoryRecord.sku)
+        .where(InventoryRecord.sku.in_(list(demand)))
+        .order_by(InventoryRecord.sku)
+        .with_for_update()
+    )
+    result = await db.execute(
+        update(InventoryRecord)
+        .where(
+            InventoryRecord.sku.in_(locked),
+            InventoryRecord.available_grams >= grams,
+        )
+        .values(available_grams=InventoryRecord.available_grams - grams)
+        .returning(InventoryRecord.sku, InventoryRecord.available_grams)
+        .execution_options(synchronize_session=False)
+    )
+    remaining = dict(result.all())
+    if len(remaining) == len(demand):
+        return remaining
+
+    missing = [key for key in demand if key not in remaining]
+    tracked = await db.scalars(
+        select(InventoryRecord.sku).where(InventoryRecord.sku.in_(missing))
+    )
+    short = sorted(tracked.all())
+    if short:
+        raise StockError(short)
+    return remaining
+
+
+def catalog_skus(
+    products: Sequence[Product], outcomes: Sequence[BlendOutcome]
+) -> list[str]:
+    keys = [sku("product", product.id) for product in products]
+    for outcome in outcomes:
+        keys.extend(sku("base", item.id) for item in outcome.bases)
+        keys.extend(sku("botanical", item.id) for item in outcome.botanicals)
+        keys.extend(sku("flavor", item.id) for item in outcome.flavors)
+    return list(dict.fromkeys(keys))
+
+
+def seed_inventory(
+    db: Session, skus: Sequence[str], grams: int = INVENTORY_SEED_GRAMS
+) -> None:
+    if not skus:
+        return
+    dialect = db.get_bind().dialect.name
+    db.execute(
+        STOCK_INSERTS.get(dialect, postgresql_insert)(InventoryRecord)
+        .values([{"sku": key, "available_grams": grams} for key in skus])
+        .on_conflict_do_nothing(index_elements=[InventoryRecord.sku])
+    )
+
+
+class AvailabilityCache:
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker = AsyncSessionLocal,
+        ttl: float = INVENTORY_CACHE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.sessionmaker = sessionmaker
+        self.ttl = ttl
+        self.clock = clock
+        self.levels: dict[str, int] = {}
+        self.refreshes = 0
+        self._expires = float("-inf")
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def current(self) -> dict[str, int]:
+        if self.clock() < self._expires:
+            return self.levels
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.clock() >= self._expires:
+                await self.refresh()
+        return self.levels
+
+    async def refresh(self) -> None:
+        try:
+            async with self.sessionmaker() as db:
+                rows = await db.execute(
+                    select(InventoryRecord.sku, InventoryRecord.available_grams)
+                )
+                self.levels = dict(rows.all())
+            self.refreshes += 1
+        except (OSError, SQLAlchemyError):
+            logger.warning("Could not refresh stock levels; keeping the last known")
+        self._expires = self.clock() + self.ttl
+
+    def update(self, remaining: Mapping[str, int]) -> None:
+        self.levels = {**self.levels, **remaining}
+
+    def sold_out(self, snapshot: CatalogSnapshot) -> frozenset[str]:
+        minimums = minimum_portions(snapshot.blend_sizes)
+        hidden = set()
+        for key, grams in self.levels.items():
+            kind, _, item_id = key.partition(":")
+            if kind in minimums and grams < minimums[kind]:
+                hidden.add(item_id)
+        return frozenset(hidden)
+
+
+availability = AvailabilityCache()
+
+
+def stock_version(sold_out: frozenset[str]) -> str:
+    if not sold_out:
+        return "in-stock"
+    return hashlib.sha256(",".join(sorted(sold_out)).encode()).hexdigest()[:12]
@@ -1,133 +1,597 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-
-from app.data import (
-    BLEND_OUTCOME_AXES,
-    CUSTOM_BLEND_SIZES,
-    CUSTOM_BLEND_OUTCOMES,
-    FLAVOR_CATEGORIES,
-    PRODUCTS,
-    BlendOutcome,
-    get_product,
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.blend_engine import BlendEvaluation, BlendSelection
+from app.blend_fragments import (
+    FragmentError,
+    fragment_context,
+    fragment_key,
+    fragment_selection,
+    parse_ids,
+)
+from app.catalog import CatalogSnapshot, get_snapshot
+from app.catalog_api import (
+    PRODUCT_PAGE_LIMIT,
+    CatalogQueryError,
+    catalog_document,
+    dumps,
+    find_outcome,
+    outcome_document,
+    product_page,
+)
+from app.admin import require_admin
+from app.admission import AdmissionMiddleware, admission
+from app.assets import ASSETS_URL, AssetManifest, PrecompressedStaticFiles
+from app.catalog_provider import CatalogError, CatalogReloader, catalog_loader
+from app.db import async_engine, engine, get_async_db
+from app.events import EventBatch, event_sink
+from app.inventory import StockError, availability, stock_version
+from app.metrics import (
+    CONTENT_TYPE,
+    MetricsMiddleware,
+    instrument_engine,
+    register_cache_metrics,
+    registry,
+    timed_chunks,
+    timed_phase,
+)
+from app.orders import (
+    OrderBlendRequest,
+    OrderError,
+    OrderRequest,
+    place_order,
+    price_lines,
+)
+from app.page_cache import PageCache, page_response
+from app.profiling import ProfilerMiddleware, forced_profile, profiler
+from app.recommend import RecommendationQuery, RecommendationResult
+from app.search import SEARCH_LIMIT, SearchQueryError
+from app.sessions import (
+    SESSION_COOKIE,
+    SESSION_COOKIE_SECURE,
+    CartState,
+    SessionStore,
+    SessionStoreError,
+    cart_view,
+    new_session_id,
+    session_backend,
+    sign_session_id,
+    unsign_session_id,
+)
+from app.templating import (
+    TEMPLATE_STREAMING,
+    precompile_templates,
+    stream_template,
+    template_options,
 )
 
 BASE_DIR = Path(__file__).resolve().parent
 
-app = FastAPI(title="Tea Alchemy")
+logger = logging.getLogger(__name__)
+
+
+async def startup_catalog(app: FastAPI) -> CatalogSnapshot:
+    if getattr(app.state, "catalog_preloaded", False):
+        return get_snapshot()
+    return await catalog_reloader.reload()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    snapshot, compiled = await asyncio.gather(
+        startup_catalog(app),
+        asyncio.to_thread(precompile_templates, templates.env),
+    )
+    catalog_reloader.start()
+    event_sink.start()
+    logger.info(
+        "Ready in %.1f ms: catalog %s, %d templates compiled",
+        (time.perf_counter() - started) * 1000,
+        snapshot.version,
+        len(compiled),
+    )
+    yield
+    await catalog_reloader.stop()
+    await event_sink.stop()
+    await session_store.backend.close()
+
+
+app = FastAPI(title="Tea Alchemy", lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilerMiddleware)
+
+asset_manifest = AssetManifest()
+if asset_manifest.entries:
+    app.mount(
+        ASSETS_URL,
+        PrecompressedStaticFiles(directory=asset_manifest.public_dir),
+        name="assets",
+    )
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+templates = Jinja2Templates(
+    directory=str(BASE_DIR / "templates"), **template_options()
+)
+templates.env.globals["asset_url"] = asset_manifest.url
 
+page_cache = PageCache(
+    max_entries=int(os.getenv("PAGE_CACHE_SIZE", "256")),
+    max_age=int(os.getenv("PAGE_CACHE_MAX_AGE", "60")),
+)
+api_cache = PageCache(
+    max_entries=int(os.getenv("API_CACHE_SIZE", "256")),
+    max_age=int(os.getenv("PAGE_CACHE_MAX_AGE", "60")),
+)
 
-OUTCOME_AXIS_OVERRIDES = {"energy": "Alertness"}
 
+def clear_caches(snapshot: CatalogSnapshot) -> None:
+    page_cache.clear()
+    api_cache.clear()
 
-def build_blend_outcomes() -> list[BlendOutcome]:
-    outcomes: list[BlendOutcome] = []
-    for outcome in CUSTOM_BLEND_OUTCOMES:
-        axis = OUTCOME_AXIS_OVERRIDES.get(outcome.id, outcome.title)
-        sorted_bases = sorted(
-            outcome.bases,
-            key=lambda base: base.alignment.get(axis, 0),
-            reverse=True,
-        )
-        outcomes.append(outcome.copy(update={"bases": sorted_bases[:6]}))
-    return outcomes
+
+catalog_reloader = CatalogReloader(catalog_loader(), on_swap=clear_caches)
+session_store = SessionStore(session_backend())
+
+register_cache_metrics({"pages": page_cache.stats, "api": api_cache.stats})
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
 
-def build_blend_context(request: Request) -> dict:
+def build_blend_context(request: Request, snapshot: CatalogSnapshot) -> dict:
     return {
         "request": request,
-        "outcomes": build_blend_outcomes(),
-        "outcome_axes": BLEND_OUTCOME_AXES,
-        "flavor_categories": FLAVOR_CATEGORIES,
-        "blend_sizes": CUSTOM_BLEND_SIZES,
+        "catalog_version": snapshot.version,
+        "outcomes": snapshot.outcomes,
+        "outcome_axes": snapshot.outcome_axes,
+        "flavor_categories": snapshot.flavor_categories,
+        "blend_sizes": snapshot.blend_sizes,
     }
 
 
+async def sold_out_ingredients() -> frozenset[str]:
+    await availability.current()
+    return availability.sold_out(get_snapshot())
+
+
+def render_cached_page(
+    request: Request,
+    template_name: str,
+    build_context: Callable[[CatalogSnapshot], dict],
+    key: Optional[str] = None,
+    variant: Optional[str] = None,
+    stream: bool = False,
+    snapshot: Optional[CatalogSnapshot] = None,
+) -> Response:
+    if snapshot is None:
+        snapshot = get_snapshot()
+    version = f"{snapshot.version}:{variant}" if variant else snapshot.version
+    key = key or request.url.path
+
+    if stream and TEMPLATE_STREAMING and not forced_profile():
+        page = page_cache.lookup(key, version)
+        if page is not None:
+            return page_response(request, page, page_cache.max_age)
+        with timed_phase("context"):
+            context = build_context(snapshot)
+        chunks = timed_chunks(
+            "render", stream_template(templates.get_template(template_name), context)
+        )
+        return StreamingResponse(
+            page_cache.fill(key, version, chunks),
+            media_type="text/html",
+            headers={"Cache-Control": f"public, max-age={page_cache.max_age}"},
+        )
+
+    def render() -> str:
+        with timed_phase("context"):
+            context = build_context(snapshot)
+        with timed_phase("render"):
+            return templates.get_template(template_name).render(context)
+
+    page = page_cache.get_or_render(key, version, render, refresh=forced_profile())
+    return page_response(request, page, page_cache.max_age)
+
+
+async def render_blend_page(request: Request, template_name: str) -> Response:
+    return render_cached_page(
+        request,
+        template_name,
+        lambda snapshot: build_blend_context(request, snapshot),
+        stream=True,
+    )
+
+
+def render_cached_json(
+    request: Request,
+    key: str,
+    build: Callable[[CatalogSnapshot], bytes],
+    snapshot: Optional[CatalogSnapshot] = None,
+) -> Response:
+    if snapshot is None:
+        snapshot = get_snapshot()
+
+    def render() -> bytes:
+        with timed_phase("serialize"):
+            return build(snapshot)
+
+    try:
+        page = api_cache.get_or_render(
+            key, snapshot.version, render, refresh=forced_profile()
+        )
+    except CatalogQueryError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return page_response(request, page, api_cache.max_age, "application/json")
+
+
+def session_id_for(request: Request) -> Optional[str]:
+    return unsign_session_id(request.cookies.get(SESSION_COOKIE))
+
+
+def remember_session(response: Response, session_id: str) -> None:
+    response.set_cookie(
+        SESSION_COOKIE,
+        sign_session_id(session_id),
+        max_age=session_store.ttl,
+        httponly=True,
+        samesite="lax",
+        secure=SESSION_COOKIE_SECURE,
+    )
+
+
+async def load_cart(request: Request) -> CartState:
+    try:
+        return await session_store.load(session_id_for(request))
+    except SessionStoreError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+
+
+async def save_cart(
+    request: Request, response: Response, write: Callable[[str], Awaitable[None]]
+) -> str:
+    session_id = session_id_for(request) or new_session_id()
+    try:
+        await write(session_id)
+    except SessionStoreError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    remember_session(response, session_id)
+    return session_id
+
+
 @app.get("/", response_class=HTMLResponse)
 async def product_listing(request: Request):
-    return templates.TemplateResponse(
+    return render_cached_page(
+        request,
         "index.html",
-        {
+        lambda snapshot: {
             "request": request,
-            "products": PRODUCTS,
+            "products": snapshot.products,
         },
+        stream=True,
     )
 
 
 @app.get("/products/{product_id}", response_class=HTMLResponse)
 async def product_detail(request: Request, product_id: str):
-    product = get_product(product_id)
+    snapshot = get_snapshot()
+    product = snapshot.index.products.get(product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return templates.TemplateResponse(
+    return render_cached_page(
+        request,
         "product_detail.html",
-        {
+        lambda snapshot: {
             "request": request,
             "product": product,
         },
+        snapshot=snapshot,
     )
 
 
 @app.get("/custom-blend", response_class=HTMLResponse)
 async def custom_blend_step_one(request: Request):
-    return templates.TemplateResponse(
-        "custom_blend_step1.html",
-        build_blend_context(request),
-    )
+    return await render_blend_page(request, "custom_blend_step1.html")
 
 
 @app.get("/custom-blend/step-1", response_class=HTMLResponse)
 async def custom_blend_step_one_page(request: Request):
-    return templates.TemplateResponse(
-        "custom_blend_step1.html",
-        build_blend_context(request),
-    )
+    return await render_blend_page(request, "custom_blend_step1.html")
 
 
 @app.get("/custom-blend/step-2", response_class=HTMLResponse)
 async def custom_blend_step_two_page(request: Request):
-    return templates.TemplateResponse(
-        "custom_blend_step2.html",
-        build_blend_context(request),
-    )
+    return await render_blend_page(request, "custom_blend_step2.html")
 
 
 @app.get("/custom-blend/step-3", response_class=HTMLResponse)
 async def custom_blend_step_three_page(request: Request):
-    return templates.TemplateResponse(
-        "custom_blend_step3.html",
-        build_blend_context(request),
-    )
+    return await render_blend_page(request, "custom_blend_step3.html")
 
 
 @app.get("/custom-blend/step-4", response_class=HTMLResponse)
 async def custom_blend_step_four_page(request: Request):
-    return templates.TemplateResponse(
-        "custom_blend_step4.html",
-        build_blend_context(request),
-    )
+    return await render_blend_page(request, "custom_blend_step4.html")
+
+
+@app.get("/custom-blend/fragment/{step}", response_class=HTMLResponse)
+async def custom_blend_fragment(
+    request: Request,
+    step: str,
+    outcome: str,
+    base: Optional[str] = None,
+    botanicals: Optional[str] = None,
+):
+    sold_out = await sold_out_ingredients()
+    snapshot = get_snapshot()
+    try:
+        _, base, botanical_ids = fragment_selection(
+            snapshot, step, outcome, base, parse_ids(botanicals)
+        )
+        return render_cached_page(
+            request,
+            "custom_blend_fragment.html",
+            lambda snapshot: fragment_context(
+                snapshot, step, outcome, base, botanical_ids, sold_out
+            ),
+            key=fragment_key(step, outcome, base, botanical_ids),
+            variant=stock_version(sold_out),
+            snapshot=snapshot,
+        )
+    except FragmentError as error:
+        raise HTTPException(status_code=error.status_code, detail=str(error))
 
 
 @app.get("/cart", response_class=HTMLResponse)
 async def cart_review(request: Request):
-    return templates.TemplateResponse("cart.html", {"request": request})
+    try:
+        state = await session_store.load(session_id_for(request))
+    except SessionStoreError:
+        logger.warning("Session store unavailable; rendering an empty cart")
+        state = CartState()
+    with timed_phase("render"):
+        return templates.TemplateResponse(
+            "cart.html",
+            {"request": request, "cart": cart_view(state, get_snapshot())},
+            headers={"Cache-Control": "private, no-store"},
+        )
 
 
 @app.get("/checkout", response_class=HTMLResponse)
 async def checkout(request: Request):
-    return templates.TemplateResponse("checkout.html", {"request": request})
+    with timed_phase("render"):
+        return templates.TemplateResponse("checkout.html", {"request": request})
 
 
 @app.get("/confirmation", response_class=HTMLResponse)
 async def confirmation(request: Request):
-    return templates.TemplateResponse("confirmation.html", {"request": request})
+    with timed_phase("render"):
+        return templates.TemplateResponse("confirmation.html", {"request": request})
+
+
+@app.get("/api/catalog")
+async def catalog_json(request: Request, fields: Optional[str] = None):
+    return render_cached_json(
+        request,
+        f"catalog|{fields}",
+        lambda snapshot: catalog_document(snapshot, fields),
+    )
+
+
+@app.get("/api/products")
+async def product_list(
+    request: Request,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = PRODUCT_PAGE_LIMIT,
+):
+    return render_cached_json(
+        request,
+        f"products|{fields}|{cursor}|{limit}",
+        lambda snapshot: product_page(snapshot, fields, cursor, limit),
+    )
+
+
+@app.get("/api/outcomes/{outcome_id}")
+async def outcome_json(request: Request, outcome_id: str, fields: Optional[str] = None):
+    snapshot = get_snapshot()
+    outcome = find_outcome(snapshot, outcome_id)
+    if outcome is None:
+        raise HTTPException(status_code=404, detail="Outcome not found")
+    return render_cached_json(
+        request,
+        f"outcome|{outcome_id}|{fields}",
+        lambda snapshot: outcome_document(snapshot, outcome, fields),
+        snapshot=snapshot,
+    )
+
+
+@app.get("/api/search")
+async def search(
+    q: str = "",
+    kind: Optional[str] = None,
+    outcome: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = SEARCH_LIMIT,
+    offset: int = 0,
+):
+    snapshot = get_snapshot()
+    try:
+        with timed_phase("search"):
+            results = snapshot.search_index.search(
+                q, kind, outcome, category, limit, offset
+            )
+    except SearchQueryError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return Response(
+        content=dumps({"version": snapshot.version, **results}),
+        media_type="application/json",
+    )
+
+
+@app.get("/api/cart")
+async def get_cart(request: Request):
+    return cart_view(await load_cart(request), get_snapshot())
+
+
+@app.put("/api/cart")
+async def put_cart(request: Request, response: Response, state: CartState):
+    snapshot = get_snapshot()
+    blend = state.custom_blend
+    try:
+        price_lines(
+            state.items,
+            blend if blend is not None and blend.size_label is not None else None,
+            snapshot,
+        )
+    except OrderError as error:
+        raise HTTPException(status_code=error.status_code, detail=str(error))
+    if "custom_blend" in state.model_fields_set:
+        await save_cart(
+            request, response, lambda session_id: session_store.save(session_id, state)
+        )
+        return cart_view(state, snapshot)
+    existing = session_id_for(request) is not None
+    await save_cart(
+        request,
+        response,
+        lambda session_id: session_store.save_items(session_id, state.items),
+    )
+    if existing:
+        state.custom_blend = (await load_cart(request)).custom_blend
+    return cart_view(state, snapshot)
+
+
+@app.put("/api/cart/blend")
+async def put_cart_blend(
+    request: Request, response: Response, blend: Optional[OrderBlendRequest] = None
+):
+    existing = session_id_for(request) is not None
+    await save_cart(
+        request,
+        response,
+        lambda session_id: session_store.save_blend(session_id, blend),
+    )
+    state = await load_cart(request) if existing else CartState()
+    state.custom_blend = blend
+    return cart_view(state, get_snapshot())
+
+
+@app.post("/api/blend/evaluate", response_model=BlendEvaluation)
+async def evaluate_blend(selection: BlendSelection):
+    return get_snapshot().blend_engine.evaluate(selection)
+
+
+@app.post("/api/blend/recommendations", response_model=RecommendationResult)
+async def recommend_blends(query: RecommendationQuery):
+    return get_snapshot().recommender.recommend(query)
+
+
+@app.post("/api/orders", status_code=201)
+async def create_order(
+    request: Request,
+    order: OrderRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        body, created = await place_order(db, order, get_snapshot(), idempotency_key)
+    except (OrderError, StockError) as error:
+        raise HTTPException(status_code=error.status_code, detail=str(error))
+    session_id = session_id_for(request)
+    if created and session_id is not None:
+        try:
+            await session_store.clear(session_id)
+        except SessionStoreError:
+            logger.warning("Could not clear the cart for a placed order")
+    if not created:
+        response.status_code = 200
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+
+@app.post("/api/events", status_code=202)
+async def record_events(request: Request, batch: EventBatch):
+    accepted = event_sink.enqueue(batch.events, session_id_for(request))
+    return {"accepted": accepted, "dropped": len(batch.events) - accepted}
+
+
+@app.get("/api/catalog/status")
+async def catalog_status():
+    return catalog_reloader.status()
+
+
+@app.post("/api/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_catalog():
+    try:
+        await catalog_reloader.reload()
+    except CatalogError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return catalog_reloader.status()
+
+
+@app.get("/api/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    return profiler.list_profiles()
+
+
+@app.get("/api/profiles/top", dependencies=[Depends(require_admin)])
+async def hot_functions(minutes: float = 10, limit: int = 20):
+    return profiler.hot_functions.top(minutes, limit)
+
+
+@app.get("/api/profiles/{name}", dependencies=[Depends(require_admin)])
+async def download_profile(name: str):
+    path = profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path)
+
+
+@app.get("/api/admission", dependencies=[Depends(require_admin)])
+async def admission_status():
+    return admission.stats()
+
+
+@app.get("/api/events/status", dependencies=[Depends(require_admin)])
+async def events_status():
+    return event_sink.status()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/page-cache")
+async def page_cache_stats():
+    return page_cache.stats()
+
+
+@app.get("/api/inventory", dependencies=[Depends(require_admin)])
+async def inventory_levels():
+    await availability.refresh()
+    return {
+        "levels": availability.levels,
+        "sold_out": sorted(availability.sold_out(get_snapshot())),
+    }
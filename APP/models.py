@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    Numeric,
+    String,
+    Table,
+    Text,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db import Base
+
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def link_table(name: str, left: tuple[str, str], right: tuple[str, str]) -> Table:
+    return Table(
+        name,
+        Base.metadata,
+        Column(left[0], ForeignKey(left[1], ondelete="CASCADE"), primary_key=True),
+        Column(right[0], ForeignKey(right[1], ondelete="CASCADE"), primary_key=True),
+        Column("position", Integer, nullable=False, default=0),
+    )
+
+
+botanical_bases = link_table(
+    "blend_botanical_bases",
+    ("botanical_id", "blend_botanicals.id"),
+    ("base_id", "blend_bases.id"),
+)
+flavor_bases = link_table(
+    "blend_flavor_bases",
+    ("flavor_id", "blend_flavors.id"),
+    ("base_id", "blend_bases.id"),
+)
+flavor_botanicals = link_table(
+    "blend_flavor_botanicals",
+    ("flavor_id", "blend_flavors.id"),
+    ("botanical_id", "blend_botanicals.id"),
+)
+flavor_incompatibilities = link_table(
+    "blend_flavor_incompatibilities",
+    ("flavor_id", "blend_flavors.id"),
+    ("incompatible_id", "blend_flavors.id"),
+)
+
+
+class ProductRecord(Base):
+    __tablename__ = "products"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, index=True)
+    name: Mapped[str] = mapped_column(String(128))
+    description: Mapped[str] = mapped_column(Text)
+    outcomes: Mapped[list] = mapped_column(JSONType)
+    image: Mapped[str] = mapped_column(String(255))
+    image_alt: Mapped[str] = mapped_column(String(255))
+    sizes: Mapped[List[ProductSizeRecord]] = relationship(
+        back_populates="product",
+        order_by="ProductSizeRecord.position",
+        cascade="all, delete-orphan",
+    )
+
+
+class ProductSizeRecord(Base):
+    __tablename__ = "product_sizes"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_id: Mapped[str] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), index=True
+    )
+    position: Mapped[int] = mapped_column(Integer)
+    label: Mapped[str] = mapped_column(String(32))
+    grams: Mapped[int] = mapped_column(Integer)
+    price_aud: Mapped[float] = mapped_column(Float)
+    product: Mapped[ProductRecord] = relationship(back_populates="sizes")
+
+
+class BlendSizeRecord(Base):
+    __tablename__ = "blend_sizes"
+
+    label: Mapped[str] = mapped_column(String(32), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, index=True)
+    grams: Mapped[int] = mapped_column(Integer)
+    price_aud: Mapped[float] = mapped_column(Float)
+
+
+class BlendOutcomeRecord(Base):
+    __tablename__ = "blend_outcomes"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, index=True)
+    title: Mapped[str] = mapped_column(String(128))
+    description: Mapped[str] = mapped_column(Text)
+    bases: Mapped[List[BlendBaseRecord]] = relationship(
+        back_populates="outcome",
+        order_by="BlendBaseRecord.position",
+        cascade="all, delete-orphan",
+    )
+    botanicals: Mapped[List[BlendBotanicalRecord]] = relationship(
+        back_populates="outcome",
+        order_by="BlendBotanicalRecord.position",
+        cascade="all, delete-orphan",
+    )
+    flavors: Mapped[List[BlendFlavorRecord]] = relationship(
+        back_populates="outcome",
+        order_by="BlendFlavorRecord.position",
+        cascade="all, delete-orphan",
+    )
+
+
+class BlendBaseRecord(Base):
+    __tablename__ = "blend_bases"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    outcome_id: Mapped[str] = mapped_column(
+        ForeignKey("blend_outcomes.id", ondelete="CASCADE"), index=True
+    )
+    position: Mapped[int] = mapped_column(Integer)
+    title: Mapped[str] = mapped_column(String(128))
+    description: Mapped[str] = mapped_column(Text)
+    alignment: Mapped[dict] = mapped_column(JSONType)
+    image: Mapped[str] = mapped_column(String(255))
+    image_alt: Mapped[str] = mapped_column(String(255))
+    outcome: Mapped[BlendOutcomeRecord] = relationship(back_populates="bases")
+
+
+class BlendBotanicalRecord(Base):
+    __tablename__ = "blend_botanicals"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    outcome_id: Mapped[str] = mapped_column(
+        ForeignKey("blend_outcomes.id", ondelete="CASCADE"), index=True
+    )
+    position: Mapped[int] = mapped_column(Integer)
+    title: Mapped[str] = mapped_column(String(128))
+    attributes: Mapped[list] = mapped_column(JSONType)
+    contributions: Mapped[dict] = mapped_column(JSONType)
+    image: Mapped[str] = mapped_column(String(255))
+    image_alt: Mapped[str] = mapped_column(String(255))
+    outcome: Mapped[BlendOutcomeRecord] = relationship(back_populates="botanicals")
+    bases: Mapped[List[BlendBaseRecord]] = relationship(
+        secondary=botanical_bases, order_by=botanical_bases.c.position, viewonly=True
+    )
+
+
+class BlendFlavorRecord(Base):
+    __tablename__ = "blend_flavors"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    outcome_id: Mapped[str] = mapped_column(
+        ForeignKey("blend_outcomes.id", ondelete="CASCADE"), index=True
+    )
+    position: Mapped[int] = mapped_column(Integer)
+    title: Mapped[str] = mapped_column(String(128))
+    category: Mapped[str] = mapped_column(String(64))
+    notes: Mapped[list] = mapped_column(JSONType)
+    spectrum: Mapped[dict] = mapped_column(JSONType)
+    image: Mapped[str] = mapped_column(String(255))
+    image_alt: Mapped[str] = mapped_column(String(255))
+    outcome: Mapped[BlendOutcomeRecord] = relationship(back_populates="flavors")
+    bases: Mapped[List[BlendBaseRecord]] = relationship(
+        secondary=flavor_bases, order_by=flavor_bases.c.position, viewonly=True
+    )
+    botanicals: Mapped[List[BlendBotanicalRecord]] = relationship(
+        secondary=flavor_botanicals, order_by=flavor_botanicals.c.position, viewonly=True
+    )
+    incompatible_with: Mapped[List[BlendFlavorRecord]] = relationship(
+        secondary=flavor_incompatibilities,
+        primaryjoin=lambda: BlendFlavorRecord.id == flavor_incompatibilities.c.flavor_id,
+        secondaryjoin=lambda: BlendFlavorRecord.id
+        == flavor_incompatibilities.c.incompatible_id,
+        order_by=flavor_incompatibilities.c.position,
+        viewonly=True,
+    )
+
+
+class OrderRecord(Base):
+    __tablename__ = "orders"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(255), unique=True)
+    request_hash: Mapped[str] = mapped_column(String(64))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    email: Mapped[str] = mapped_column(String(255))
+    recipient: Mapped[str] = mapped_column(String(255))
+    phone: Mapped[Optional[str]] = mapped_column(String(64))
+    address: Mapped[str] = mapped_column(Text)
+    country: Mapped[str] = mapped_column(String(2))
+    delivery_notes: Mapped[Optional[str]] = mapped_column(Text)
+    item_count: Mapped[int] = mapped_column(Integer)
+    subtotal_aud: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    shipping_aud: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    total_aud: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    card_last4: Mapped[Optional[str]] = mapped_column(String(4))
+    response: Mapped[dict] = mapped_column(JSONType)
+    lines: Mapped[List[OrderLineRecord]] = relationship(
+        back_populates="order",
+        order_by="OrderLineRecord.position",
+        cascade="all, delete-orphan",
+    )
+
+
+class OrderLineRecord(Base):
+    __tablename__ = "order_lines"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    order_id: Mapped[str] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), index=True
+    )
+    position: Mapped[int] = mapped_column(Integer)
+    kind: Mapped[str] = mapped_column(String(16))
+    product_id: Mapped[Optional[str]] = mapped_column(String(64))
+    name: Mapped[str] = mapped_column(String(255))
+    size_label: Mapped[str] = mapped_column(String(32))
+    grams: Mapped[int] = mapped_column(Integer)
+    quantity: Mapped[int] = mapped_column(Integer)
+    unit_price_aud: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    total_aud: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    details: Mapped[Optional[dict]] = mapped_column(JSONType)
+    order: Mapped[OrderRecord] = relationship(back_populates="lines")
+
+
+class InventoryRecord(Base):
+    __tablename__ = "inventory"
+
+    sku: Mapped[str] = mapped_column(String(80), primary_key=True)
+    available_grams: Mapped[int] = mapped_column(Integer)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class EventRecord(Base):
+    __tablename__ = "analytics_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    name: Mapped[str] = mapped_column(String(32), index=True)
+    step: Mapped[Optional[int]] = mapped_column(Integer)
+    visitor: Mapped[Optional[str]] = mapped_column(String(32), index=True)
+    path: Mapped[Optional[str]] = mapped_column(String(255))
+    properties: Mapped[Optional[dict]] = mapped_column(JSONType)
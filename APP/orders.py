@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import hashlib
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.blend_engine import BlendSelection
+from app.catalog import CatalogSnapshot
+from app.inventory import (
+    StockError,
+    availability,
+    reservation_grams,
+    reserve_stock,
+)
+from app.models import OrderLineRecord, OrderRecord
+
+CENTS = Decimal("0.01")
+SHIPPING_RATES = {
+    "AU": (Decimal("6.50"), Decimal("65.00")),
+    "NZ": (Decimal("11.50"), Decimal("75.00")),
+}
+COUNTRY_NAMES = {"AU": "Australia", "NZ": "New Zealand"}
+PAYMENT_PROVIDER = "Tea Alchemy Payments"
+CONFLICT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+class OrderError(Exception):
+    def __init__(self, message: str, status_code: int = 422) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OrderLineRequest(BaseModel):
+    product_id: str
+    size_label: str
+    quantity: int = Field(ge=1, le=99)
+
+
+class OrderBlendRequest(BlendSelection):
+    blend_name: Optional[str] = Field(default=None, max_length=32)
+
+
+class OrderRequest(BaseModel):
+    first_name: str = Field(min_length=1, max_length=120)
+    last_name: str = Field(min_length=1, max_length=120)
+    email: str = Field(min_length=3, max_length=255)
+    phone: Optional[str] = Field(default=None, max_length=64)
+    address_line1: str = Field(min_length=1, max_length=255)
+    address_line2: Optional[str] = Field(default=None, max_length=255)
+    city: str = Field(min_length=1, max_length=120)
+    state: str = Field(min_length=1, max_length=120)
+    postal: str = Field(min_length=1, max_length=16)
+    country: str
+    delivery_notes: Optional[str] = Field(default=None, max_length=1000)
+    card_last4: Optional[str] = Field(default=None, pattern=r"^\d{4}$")
+    items: List[OrderLineRequest] = Field(default=[], max_length=50)
+    custom_blend: Optional[OrderBlendRequest] = None
+
+
+@dataclass(frozen=True)
+class PricedOrder:
+    lines: list[dict]
+    count: int
+    subtotal: Decimal
+    shipping: Decimal
+
+    @property
+    def total(self) -> Decimal:
+        return self.subtotal + self.shipping
+
+
+def money(value: float | Decimal) -> Decimal:
+    return Decimal(str(value)).quantize(CENTS)
+
+
+def shipping_for(country: str, subtotal: Decimal) -> Decimal:
+    rate = SHIPPING_RATES.get(country)
+    if rate is None:
+        raise OrderError("Select Australia or New Zealand to calculate shipping.")
+    base, free_threshold = rate
+    return Decimal("0.00") if subtotal >= free_threshold else base
+
+
+def price_lines(
+    items: Sequence[OrderLineRequest],
+    blend: Optional[OrderBlendRequest],
+    snapshot: CatalogSnapshot,
+) -> list[dict]:
+    lines: list[dict] = []
+    for item in items:
+        product = snapshot.index.products.get(item.product_id)
+        if product is None:
+            raise OrderError(f"Unknown product: {item.product_id}")
+        size = next(
+            (size for size in product.sizes if size.label == item.size_label), None
+        )
+        if size is None:
+            raise OrderError(f"{product.name} is not sold in {item.size_label}.")
+        unit_price = money(size.price_aud)
+        lines.append(
+            {
+                "kind": "product",
+                "product_id": product.id,
+                "name": product.name,
+                "size_label": size.label,
+                "grams": size.grams,
+                "quantity": item.quantity,
+                "unit_price_aud": unit_price,
+                "total_aud": unit_price * item.quantity,
+                "details": None,
+            }
+        )
+
+    if blend is not None:
+        if blend.size_label is None:
+            raise OrderError("Choose a size for your custom blend.")
+        evaluation = snapshot.blend_engine.evaluate(blend)
+        if not evaluation.valid:
+            raise OrderError(" ".join(evaluation.errors))
+        size = snapshot.blend_engine.sizes[blend.size_label]
+        unit_price = money(size.price_aud)
+        lines.append(
+            {
+                "kind": "blend",
+                "product_id": None,
+                "name": (blend.blend_name or "").strip() or "Custom Blend",
+                "size_label": size.label,
+                "grams": size.grams,
+                "quantity": 1,
+                "unit_price_aud": unit_price,
+                "total_aud": unit_price,
+                "details": blend.model_dump(exclude={"blend_name", "size_label"}),
+            }
+        )
+    return lines
+
+
+def price_order(order: OrderRequest, snapshot: CatalogSnapshot) -> PricedOrder:
+    lines = price_lines(order.items, order.custom_blend, snapshot)
+    if not lines:
+        raise OrderError("Add at least one item to your cart to place an order.")
+
+    subtotal = sum((line["total_aud"] for line in lines), Decimal("0.00"))
+    return PricedOrder(
+        lines=lines,
+        count=sum(line["quantity"] for line in lines),
+        subtotal=subtotal,
+        shipping=shipping_for(order.country, subtotal),
+    )
+
+
+def request_fingerprint(order: OrderRequest) -> str:
+    return hashlib.sha256(order.model_dump_json().encode()).hexdigest()
+
+
+def new_order_id() -> str:
+    return f"TA-{secrets.token_hex(5).upper()}"
+
+
+def format_address(order: OrderRequest) -> str:
+    parts = [order.address_line1]
+    if order.address_line2:
+        parts.append(order.address_line2)
+    parts.append(f"{order.city} {order.state} {order.postal}")
+    parts.append(COUNTRY_NAMES[order.country])
+    return ", ".join(part for part in parts if part)
+
+
+def line_meta(line: dict) -> str:
+    if line["kind"] == "blend":
+        return f"{line['size_label']} ({line['grams']}g)"
+    return f"{line['size_label']} · Qty {line['quantity']}"
+
+
+def order_response(order_id: str, order: OrderRequest, priced: PricedOrder) -> dict:
+    return {
+        "id": order_id,
+        "placedAt": datetime.now(timezone.utc).strftime("%d/%m/%Y, %H:%M UTC"),
+        "recipient": f"{order.first_name} {order.last_name}",
+        "address": format_address(order),
+        "email": order.email,
+        "count": priced.count,
+        "items": [
+            {
+                "name": line["name"],
+                "meta": line_meta(line),
+                "total": float(line["total_aud"]),
+            }
+            for line in priced.lines
+        ],
+        "subtotal": float(priced.subtotal),
+        "shipping": float(priced.shipping),
+        "total": float(priced.total),
+        "payment": {
+            "provider": PAYMENT_PROVIDER,
+            "method": "Card",
+            "last4": order.card_last4 or "0000",
+        },
+    }
+
+
+async def find_order(db: AsyncSession, idempotency_key: str) -> OrderRecord | None:
+    return await db.scalar(
+        select(OrderRecord).where(OrderRecord.idempotency_key == idempotency_key)
+    )
+
+
+def replay(existing: OrderRecord, fingerprint: str) -> tuple[dict, bool]:
+    if existing.request_hash != fingerprint:
+        raise OrderError(
+            "Idempotency-Key was already used for a different order.", status_code=409
+        )
+    return existing.response, False
+
+
+async def place_order(
+    db: AsyncSession,
+    order: OrderRequest,
+    snapshot: CatalogSnapshot,
+    idempotency_key: str | None = None,
+) -> tuple[dict, bool]:
+    fingerprint = request_fingerprint(order)
+    if idempotency_key:
+        existing = await find_order(db, idempotency_key)
+        if existing is not None:
+            return replay(existing, fingerprint)
+
+    priced = price_order(order, snapshot)
+    order_id = new_order_id()
+    response = order_response(order_id, order, priced)
+
+    try:
+        remaining = await reserve_stock(db, reservation_grams(priced.lines))
+    except StockError:
+        await db.rollback()
+        raise
+
+    dialect = db.get_bind().dialect.name
+    statement = CONFLICT_INSERTS.get(dialect, postgresql_insert)(OrderRecord).values(
+        id=order_id,
+        idempotency_key=idempotency_key,
+        request_hash=fingerprint,
+        email=order.email,
+        recipient=response["recipient"],
+        phone=order.phone,
+        address=response["address"],
+        country=order.country,
+        delivery_notes=order.delivery_notes,
+        item_count=priced.count,
+        subtotal_aud=priced.subtotal,
+        shipping_aud=priced.shipping,
+        total_aud=priced.total,
+        card_last4=order.card_last4,
+        response=response,
+    )
+    if idempotency_key:
+        statement = statement.on_conflict_do_nothing(
+            index_elements=[OrderRecord.idempotency_key]
+        )
+    result = await db.execute(statement.returning(OrderRecord.id))
+    inserted = result.scalar_one_or_none()
+    if inserted is None:
+        await db.rollback()
+        existing = await find_order(db, idempotency_key)
+        if existing is None:
+            raise OrderError("Order is still being processed; retry shortly.", 409)
+        return replay(existing, fingerprint)
+
+    await db.execute(
+        insert(OrderLineRecord),
+        [
+            {"order_id": order_id, "position": position, **line}
+            for position, line in enumerate(priced.lines)
+        ],
+    )
+    await db.commit()
+    availability.update(remaining)
+    return response, True
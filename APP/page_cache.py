@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from fastapi import Request, Response
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    body: bytes
+    etag: str
+
+
+class PageCache:
+    def __init__(self, max_entries: int = 256, max_age: int = 60) -> None:
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], CachedPage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, version: str) -> Optional[CachedPage]:
+        cache_key = (key, version)
+        with self._lock:
+            page = self._entries.get(cache_key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return page
+
+    def store(self, key: str, version: str, body: str | bytes) -> CachedPage:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        page = CachedPage(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        cache_key = (key, version)
+        with self._lock:
+            self._entries[cache_key] = page
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return page
+
+    def get_or_render(
+        self,
+        key: str,
+        version: str,
+        render: Callable[[], str | bytes],
+        refresh: bool = False,
+    ) -> CachedPage:
+        if refresh:
+            with self._lock:
+                self.misses += 1
+        else:
+            page = self.lookup(key, version)
+            if page is not None:
+                return page
+        return self.store(key, version, render())
+
+    async def fill(
+        self, key: str, version: str, chunks: Iterable[bytes]
+    ) -> AsyncIterator[bytes]:
+        body: list[bytes] = []
+        for chunk in chunks:
+            body.append(chunk)
+            yield chunk
+        self.store(key, version, b"".join(body))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def page_response(
+    request: Request,
+    page: CachedPage,
+    max_age: int,
+    media_type: str = "text/html",
+) -> Response:
+    headers = {
+        "ETag": page.etag,
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type=media_type, headers=headers)
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.admin import is_admin
+from app.metrics import Counter as MetricCounter
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(
+    os.getenv("PROFILE_DIR", str(Path(__file__).resolve().parent / "profiles"))
+)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_WINDOW_SECONDS = float(os.getenv("PROFILE_WINDOW_SECONDS", "3600"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_MAX_AGE_SECONDS = float(os.getenv("PROFILE_MAX_AGE_SECONDS", "86400"))
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed")
+PROFILE_FORMATS = {"collapsed": "folded", "speedscope": "speedscope.json"}
+PROFILE_HEADER = "x-profile"
+IDLE_FRAMES = frozenset(
+    {
+        "selectors:select",
+        "threading:wait",
+        "queue:get",
+        "concurrent.futures.thread:_worker",
+    }
+)
+
+Frame = tuple[str, str, int]
+Stack = tuple[Frame, ...]
+
+PROFILES = registry.register(
+    MetricCounter(
+        "profiles_captured_total",
+        "Requests captured by the sampling profiler.",
+        ("trigger",),
+    )
+)
+
+_forced: ContextVar[bool] = ContextVar("forced_profile", default=False)
+
+
+def forced_profile() -> bool:
+    return _forced.get()
+
+
+def frame_label(frame) -> Frame:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return (f"{module}:{code.co_name}", code.co_filename, code.co_firstlineno)
+
+
+def walk_stack(frame) -> list[Frame]:
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def clean_name(name: str) -> str:
+    return name.replace(";", ":").replace(" ", "_")
+
+
+class StackSampler:
+    def __init__(
+        self,
+        interval: float = PROFILE_INTERVAL,
+        max_seconds: float = PROFILE_MAX_SECONDS,
+    ) -> None:
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter[Stack] = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> Counter[Stack]:
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+        self.duration = time.perf_counter() - self._started
+        return self.stacks
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names: dict[int, str] = {}
+        deadline = self._started + self.max_seconds
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = walk_stack(frame)
+                if not stack or stack[-1][0] in IDLE_FRAMES:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                thread = (clean_name(names.get(ident, str(ident))), "", 0)
+                self.stacks[(thread, *stack)] += 1
+
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    trigger: str
+    format: str
+    interval: float
+    started_at: float
+    duration: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    @property
+    def filename(self) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", self.path).strip("-") or "root"
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self.started_at))
+        return f"{stamp}-{self.method.lower()}-{slug}-{self.id}.{PROFILE_FORMATS[self.format]}"
+
+
+def collapsed_stacks(profile: Profile) -> str:
+    lines = [
+        f"{';'.join(clean_name(frame[0]) for frame in stack)} {count}"
+        for stack, count in sorted(profile.stacks.items())
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def speedscope_document(profile: Profile) -> dict:
+    frames: list[dict] = []
+    positions: dict[Frame, int] = {}
+    samples: list[list[int]] = []
+    weights: list[float] = []
+    for stack, count in sorted(profile.stacks.items()):
+        sample = []
+        for frame in stack:
+            if frame not in positions:
+                positions[frame] = len(frames)
+                entry = {"name": frame[0]}
+                if frame[1]:
+                    entry.update(file=frame[1], line=frame[2])
+                frames.append(entry)
+            sample.append(positions[frame])
+        samples.append(sample)
+        weights.append(count * profile.interval)
+    name = f"{profile.method} {profile.path}"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "tea-alchemy",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def profile_files(directory: Path) -> list[tuple[Path, os.stat_result]]:
+    if not directory.is_dir():
+        return []
+    suffixes = tuple(f".{suffix}" for suffix in PROFILE_FORMATS.values())
+    files = []
+    for path in directory.iterdir():
+        if not path.name.endswith(suffixes):
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((path, stat))
+    files.sort(key=lambda entry: entry[1].st_mtime, reverse=True)
+    return files
+
+
+def retained_profiles(
+    directory: Path,
+    max_files: int = PROFILE_MAX_FILES,
+    max_age: float = PROFILE_MAX_AGE_SECONDS,
+) -> tuple[list[tuple[Path, os.stat_result]], list[Path]]:
+    oldest = time.time() - max_age
+    kept, expired = [], []
+    for path, stat in profile_files(directory):
+        if len(kept) < max_files and stat.st_mtime >= oldest:
+            kept.append((path, stat))
+        else:
+            expired.append(path)
+    return kept, expired
+
+
+def prune_profiles(
+    directory: Path,
+    max_files: int = PROFILE_MAX_FILES,
+    max_age: float = PROFILE_MAX_AGE_SECONDS,
+) -> int:
+    _, expired = retained_profiles(directory, max_files, max_age)
+    for path in expired:
+        path.unlink(missing_ok=True)
+    return len(expired)
+
+
+def write_profile(profile: Profile, directory: Path = PROFILE_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / profile.filename
+    if profile.format == "speedscope":
+        path.write_text(json.dumps(speedscope_document(profile)))
+    else:
+        path.write_text(collapsed_stacks(profile))
+    prune_profiles(directory)
+    return path
+
+
+class HotFunctions:
+    def __init__(self, window: float = PROFILE_WINDOW_SECONDS) -> None:
+        self.window = window
+        self._profiles: deque[tuple[float, Counter[str], Counter[str]]] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in profile.stacks.items():
+            own[stack[-1][0]] += count
+            for name in {frame[0] for frame in stack[1:]}:
+                total[name] += count
+        now = time.time()
+        with self._lock:
+            self._profiles.append((now, own, total))
+            while self._profiles and self._profiles[0][0] < now - self.window:
+                self._profiles.popleft()
+
+    def top(self, minutes: float = 10, limit: int = 20) -> dict:
+        cutoff = time.time() - minutes * 60
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        with self._lock:
+            recent = [entry for entry in self._profiles if entry[0] >= cutoff]
+        for _, profile_own, profile_total in recent:
+            own.update(profile_own)
+            total.update(profile_total)
+        samples = sum(own.values())
+        names = sorted(total, key=lambda name: (-own[name], -total[name], name))
+        return {
+            "minutes": minutes,
+            "profiles": len(recent),
+            "samples": samples,
+            "functions": [
+                {
+                    "function": name,
+                    "self_samples": own[name],
+                    "total_samples": total[name],
+                    "self_percent": round(100 * own[name] / samples, 2),
+                    "total_percent": round(100 * total[name] / samples, 2),
+                }
+                for name in names[:limit]
+            ],
+        }
+
+
+class Profiler:
+    def __init__(
+        self,
+        directory: Path = PROFILE_DIR,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        interval: float = PROFILE_INTERVAL,
+        default_format: str = PROFILE_FORMAT,
+    ) -> None:
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.default_format = default_format
+        self.hot_functions = HotFunctions()
+        self._busy = threading.Lock()
+
+    def trigger(self, headers: Headers) -> Optional[tuple[str, str]]:
+        requested = headers.get(PROFILE_HEADER)
+        if requested is not None and is_admin(headers.get("x-admin-token")):
+            format = requested if requested in PROFILE_FORMATS else self.default_format
+            return "header", format
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled", self.default_format
+        return None
+
+    def begin(self) -> Optional[StackSampler]:
+        if not self._busy.acquire(blocking=False):
+            return None
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: StackSampler, profile: Profile) -> Profile:
+        try:
+            profile.stacks = sampler.stop()
+            profile.duration = sampler.duration
+        finally:
+            self._busy.release()
+        self.hot_functions.add(profile)
+        PROFILES.inc(profile.trigger)
+        return profile
+
+    def list_profiles(self) -> list[dict]:
+        kept, _ = retained_profiles(self.directory)
+        return [{"name": path.name, "bytes": stat.st_size} for path, stat in kept]
+
+    def profile_path(self, name: str) -> Optional[Path]:
+        path = self.directory / name
+        if "/" in name or name.startswith(".") or not path.is_file():
+            return None
+        return path
+
+
+profiler = Profiler()
+
+
+class ProfilerMiddleware:
+    def __init__(self, app: ASGIApp, profiler: Profiler = profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self.profiler.trigger(Headers(scope=scope))
+        sampler = self.profiler.begin() if trigger is not None else None
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(
+            id=uuid.uuid4().hex[:12],
+            method=scope["method"],
+            path=scope["path"],
+            trigger=trigger[0],
+            format=trigger[1],
+            interval=self.profiler.interval,
+            started_at=time.time(),
+        )
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            await send(message)
+
+        token = _forced.set(profile.trigger == "header")
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _forced.reset(token)
+            self.profiler.finish(sampler, profile)
+            try:
+                path = await asyncio.to_thread(
+                    write_profile, profile, self.profiler.directory
+                )
+                logger.info(
+                    "Profiled %s %s: %d samples in %.1f ms -> %s",
+                    profile.method,
+                    profile.path,
+                    profile.samples,
+                    profile.duration * 1000,
+                    path,
+                )
+            except OSError:
+                logger.exception("Could not write profile %s", profile.id)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.blend_engine import (
+    BOTANICAL_MAX,
+    FLAVOR_MAX,
+    SCORE_MAX,
+    BlendEngine,
+    OutcomeEngine,
+    iter_bits,
+)
+
+RECOMMENDATION_LIMIT_MAX = 50
+
+
+class RecommendationQuery(BaseModel):
+    outcome_id: str
+    target: dict[str, float] = {}
+    limit: int = 5
+
+
+class BlendRecommendation(BaseModel):
+    base_id: str
+    botanical_ids: List[str]
+    flavor_ids: List[str]
+    score: float
+    alignment: dict[str, int]
+    flavor_profile: dict[str, int]
+
+
+class RecommendationResult(BaseModel):
+    outcome_id: str
+    combinations: int
+    recommendations: List[BlendRecommendation]
+    error: Optional[str] = None
+
+
+def _padded(ids: Sequence[int], width: int, pad: int) -> list[int]:
+    return list(ids) + [pad] * (width - len(ids))
+
+
+@dataclass(frozen=True)
+class OutcomeCombinations:
+    engine: OutcomeEngine
+    bases: np.ndarray
+    botanicals: np.ndarray
+    flavors: np.ndarray
+    profiles: np.ndarray
+    norms: np.ndarray
+
+
+def build_outcome_combinations(engine: OutcomeEngine) -> OutcomeCombinations:
+    pad_botanical = len(engine.botanical_ids)
+    pad_flavor = len(engine.flavor_ids)
+    bases: list[int] = []
+    botanicals: list[list[int]] = []
+    flavors: list[list[int]] = []
+    for base in range(len(engine.base_ids)):
+        for botanical_set, flavor_set in engine.iter_completions(base):
+            bases.append(base)
+            botanicals.append(
+                _padded(list(iter_bits(botanical_set)), BOTANICAL_MAX, pad_botanical)
+            )
+            flavors.append(_padded(list(iter_bits(flavor_set)), FLAVOR_MAX, pad_flavor))
+
+    base_index = np.array(bases, dtype=np.int32)
+    botanical_index = np.array(botanicals, dtype=np.int32).reshape(-1, BOTANICAL_MAX)
+    flavor_index = np.array(flavors, dtype=np.int32).reshape(-1, FLAVOR_MAX)
+
+    contributions = np.vstack(
+        [
+            engine.botanical_contributions,
+            np.zeros((1, engine.botanical_contributions.shape[1]), dtype=np.int16),
+        ]
+    )
+    spectrum = np.vstack(
+        [
+            engine.flavor_spectrum,
+            np.zeros((1, engine.flavor_spectrum.shape[1]), dtype=np.int16),
+        ]
+    )
+    alignment = engine.base_alignment[base_index]
+    alignment = alignment + contributions[botanical_index].sum(axis=1)
+    flavor_profile = spectrum[flavor_index].sum(axis=1)
+    profiles = np.minimum(np.hstack([alignment, flavor_profile]), SCORE_MAX)
+    profiles = profiles.astype(np.float32)
+
+    return OutcomeCombinations(
+        engine=engine,
+        bases=base_index,
+        botanicals=botanical_index,
+        flavors=flavor_index,
+        profiles=profiles,
+        norms=np.linalg.norm(profiles, axis=1),
+    )
+
+
+@dataclass(frozen=True)
+class BlendRecommender:
+    outcomes: Mapping[str, OutcomeCombinations]
+    outcome_axes: tuple[str, ...]
+    flavor_categories: tuple[str, ...]
+    default_targets: Mapping[str, str]
+
+    def target_vector(self, outcome_id: str, target: Mapping[str, float]) -> np.ndarray:
+        columns = (*self.outcome_axes, *self.flavor_categories)
+        if not target:
+            target = {self.default_targets.get(outcome_id, ""): float(SCORE_MAX)}
+        return np.array([target.get(column, 0.0) for column in columns], dtype=np.float32)
+
+    def recommend(self, query: RecommendationQuery) -> RecommendationResult:
+        combinations = self.outcomes.get(query.outcome_id)
+        if combinations is None:
+            return RecommendationResult(
+                outcome_id=query.outcome_id,
+                combinations=0,
+                recommendations=[],
+                error=f"Unknown outcome: {query.outcome_id}",
+            )
+
+        total = len(combinations.bases)
+        limit = max(0, min(query.limit, RECOMMENDATION_LIMIT_MAX, total))
+        target = self.target_vector(query.outcome_id, query.target)
+        target_norm = float(np.linalg.norm(target))
+        if limit == 0 or target_norm == 0:
+            return RecommendationResult(
+                outcome_id=query.outcome_id, combinations=total, recommendations=[]
+            )
+
+        denominator = combinations.norms * target_norm
+        scores = np.divide(
+            combinations.profiles @ target,
+            denominator,
+            out=np.zeros(total, dtype=np.float32),
+            where=denominator > 0,
+        )
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return RecommendationResult(
+            outcome_id=query.outcome_id,
+            combinations=total,
+            recommendations=[
+                self._recommendation(combinations, row, scores) for row in top
+            ],
+        )
+
+    def _recommendation(
+        self, combinations: OutcomeCombinations, row: int, scores: np.ndarray
+    ) -> BlendRecommendation:
+        engine = combinations.engine
+        profile = combinations.profiles[row].astype(int).tolist()
+        axes = len(self.outcome_axes)
+        return BlendRecommendation(
+            base_id=engine.base_ids[combinations.bases[row]],
+            botanical_ids=[
+                engine.botanical_ids[index]
+                for index in combinations.botanicals[row]
+                if index < len(engine.botanical_ids)
+            ],
+            flavor_ids=[
+                engine.flavor_ids[index]
+                for index in combinations.flavors[row]
+                if index < len(engine.flavor_ids)
+            ],
+            score=round(float(scores[row]), 4),
+            alignment=dict(zip(self.outcome_axes, profile[:axes])),
+            flavor_profile=dict(zip(self.flavor_categories, profile[axes:])),
+        )
+
+
+def build_recommender(
+    engine: BlendEngine, default_targets: Mapping[str, str]
+) -> BlendRecommender:
+    return BlendRecommender(
+        outcomes=MappingProxyType(
+            {
+                outcome_id: build_outcome_combinations(outcome_engine)
+                for outcome_id, outcome_engine in engine.outcomes.items()
+            }
+        ),
+        outcome_axes=engine.outcome_axes,
+        flavor_categories=engine.flavor_categories,
+        default_targets=MappingProxyType(dict(default_targets)),
+    )
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.data import BlendOutcome, Product
+
+SEARCH_LIMIT = 20
+SEARCH_LIMIT_MAX = 100
+SEARCH_QUERY_MAX = 200
+SEARCH_TERMS_MAX = 8
+PREFIX_MIN = 2
+PREFIX_EXPANSIONS_MAX = 64
+TYPO_MIN = 4
+KINDS = ("product", "base", "botanical", "flavor")
+KIND_URLS = {
+    "product": "/products/{id}",
+    "base": "/custom-blend/step-2",
+    "botanical": "/custom-blend/step-3",
+    "flavor": "/custom-blend/step-4",
+}
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+class SearchQueryError(ValueError):
+    pass
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def deletions(term: str) -> set[str]:
+    return {term[:position] + term[position + 1 :] for position in range(len(term))}
+
+
+def within_one_edit(left: str, right: str) -> bool:
+    if left == right:
+        return True
+    if abs(len(left) - len(right)) > 1:
+        return False
+    if len(left) > len(right):
+        left, right = right, left
+    start = 0
+    while start < len(left) and left[start] == right[start]:
+        start += 1
+    if len(left) < len(right):
+        return left[start:] == right[start + 1 :]
+    if left[start + 1 :] == right[start + 1 :]:
+        return True
+    return (
+        start + 1 < len(left)
+        and left[start] == right[start + 1]
+        and left[start + 1] == right[start]
+        and left[start + 2 :] == right[start + 2 :]
+    )
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    kind: str
+    id: str
+    title: str
+    image: str
+    outcomes: tuple[str, ...]
+    category: Optional[str]
+
+
+@dataclass(frozen=True)
+class Facet:
+    values: tuple[str, ...]
+    masks: tuple[np.ndarray, ...]
+    lookup: Mapping[str, int]
+
+    def counts(self, selected: np.ndarray) -> dict[str, int]:
+        tally = {
+            value: int(np.count_nonzero(selected & mask))
+            for value, mask in zip(self.values, self.masks)
+        }
+        return {value: count for value, count in tally.items() if count}
+
+    def mask(self, value: str) -> Optional[np.ndarray]:
+        position = self.lookup.get(value.casefold())
+        return self.masks[position] if position is not None else None
+
+
+def build_facet(
+    assignments: Sequence[Iterable[Optional[str]]], order: Sequence[str] = ()
+) -> Facet:
+    members: dict[str, list[int]] = {value: [] for value in order}
+    for doc, values in enumerate(assignments):
+        for value in dict.fromkeys(values):
+            if value is not None:
+                members.setdefault(value, []).append(doc)
+    masks = []
+    for docs in members.values():
+        mask = np.zeros(len(assignments), dtype=bool)
+        mask[docs] = True
+        masks.append(mask)
+    return Facet(
+        values=tuple(members),
+        masks=tuple(masks),
+        lookup=MappingProxyType(
+            {value.casefold(): position for position, value in enumerate(members)}
+        ),
+    )
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    documents: tuple[SearchDocument, ...]
+    titles: Mapping[str, np.ndarray]
+    terms: Mapping[str, np.ndarray]
+    vocabulary: tuple[str, ...]
+    typo_variants: Mapping[str, tuple[str, ...]]
+    facets: Mapping[str, Facet]
+
+    @property
+    def size(self) -> int:
+        return len(self.documents)
+
+    def select(
+        self, postings: Mapping[str, np.ndarray], terms: Iterable[str]
+    ) -> np.ndarray:
+        selected = np.zeros(self.size, dtype=bool)
+        for term in terms:
+            matches = postings.get(term)
+            if matches is not None:
+                selected[matches] = True
+        return selected
+
+    def prefixed(self, token: str) -> list[str]:
+        if len(token) < PREFIX_MIN:
+            return [token] if token in self.terms else []
+        start = bisect_left(self.vocabulary, token)
+        matches = []
+        for term in self.vocabulary[start : start + PREFIX_EXPANSIONS_MAX]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def corrected(self, token: str) -> list[str]:
+        if len(token) < TYPO_MIN:
+            return []
+        candidates = {
+            term
+            for variant in (token, *deletions(token))
+            for term in self.typo_variants.get(variant, ())
+        }
+        return sorted(term for term in candidates if within_one_edit(token, term))
+
+    def expand(self, token: str) -> tuple[list[str], bool]:
+        terms = self.prefixed(token)
+        if terms:
+            return terms, False
+        return self.corrected(token), True
+
+    def filters(
+        self, kind: Optional[str], outcome: Optional[str], category: Optional[str]
+    ) -> dict[str, np.ndarray]:
+        requested = {"kind": kind, "outcome": outcome, "category": category}
+        masks = {}
+        for name, value in requested.items():
+            if value:
+                mask = self.facets[name].mask(value)
+                masks[name] = mask if mask is not None else np.zeros(self.size, bool)
+        return masks
+
+    def search(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        outcome: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = SEARCH_LIMIT,
+        offset: int = 0,
+    ) -> dict:
+        if len(query) > SEARCH_QUERY_MAX:
+            raise SearchQueryError(f"q must be at most {SEARCH_QUERY_MAX} characters.")
+        if not 1 <= limit <= SEARCH_LIMIT_MAX:
+            raise SearchQueryError(f"limit must be between 1 and {SEARCH_LIMIT_MAX}.")
+        if offset < 0:
+            raise SearchQueryError("offset must not be negative.")
+        tokens = list(dict.fromkeys(tokenize(query)))[:SEARCH_TERMS_MAX]
+
+        matched = np.ones(self.size, dtype=bool)
+        in_titles = np.ones(self.size, dtype=bool)
+        corrections: dict[str, list[str]] = {}
+        for token in tokens:
+            terms, fuzzy = self.expand(token)
+            if fuzzy and terms:
+                corrections[token] = terms
+            matched &= self.select(self.terms, terms)
+            in_titles &= self.select(self.titles, terms)
+
+        filters = self.filters(kind, outcome, category)
+        selected = matched
+        for mask in filters.values():
+            selected = selected & mask
+
+        facets = {}
+        for name, facet in self.facets.items():
+            others = matched
+            for other, mask in filters.items():
+                if other != name:
+                    others = others & mask
+            facets[name] = facet.counts(others)
+
+        hits = np.flatnonzero(selected)
+        in_title = in_titles[hits]
+        ranked = np.concatenate([hits[in_title], hits[~in_title]])
+        return {
+            "query": query,
+            "terms": tokens,
+            "corrections": corrections,
+            "total": len(hits),
+            "items": [
+                self.result(self.documents[position])
+                for position in ranked[offset : offset + limit]
+            ],
+            "facets": facets,
+        }
+
+    @staticmethod
+    def result(document: SearchDocument) -> dict:
+        return {
+            "kind": document.kind,
+            "id": document.id,
+            "title": document.title,
+            "image": document.image,
+            "outcomes": list(document.outcomes),
+            "category": document.category,
+            "url": KIND_URLS[document.kind].format(id=document.id),
+        }
+
+
+def freeze_postings(postings: Mapping[str, list[int]]) -> Mapping[str, np.ndarray]:
+    return MappingProxyType(
+        {
+            term: np.array(positions, dtype=np.int32)
+            for term, positions in postings.items()
+        }
+    )
+
+
+def build_search_index(
+    products: Sequence[Product],
+    outcomes: Sequence[BlendOutcome],
+    flavor_categories: Sequence[str],
+) -> SearchIndex:
+    documents: list[SearchDocument] = []
+    titles: dict[str, list[int]] = defaultdict(list)
+    terms: dict[str, list[int]] = defaultdict(list)
+    known_categories = {category.casefold(): category for category in flavor_categories}
+
+    def add(document: SearchDocument, *fields: str) -> None:
+        position = len(documents)
+        documents.append(document)
+        title_terms = set(tokenize(document.title))
+        for term in title_terms:
+            titles[term].append(position)
+        for term in title_terms.union(*(tokenize(field) for field in fields)):
+            terms[term].append(position)
+
+    for product in products:
+        add(
+            SearchDocument(
+                kind="product",
+                id=product.id,
+                title=product.name,
+                image=product.image,
+                outcomes=tuple(product.outcomes),
+                category=None,
+            ),
+            product.description,
+            *product.outcomes,
+        )
+    for outcome in outcomes:
+        labels = (outcome.title,)
+        for base in outcome.bases:
+            add(
+                SearchDocument("base", base.id, base.title, base.image, labels, None),
+                base.description,
+                outcome.title,
+            )
+        for botanical in outcome.botanicals:
+            add(
+                SearchDocument(
+                    "botanical",
+                    botanical.id,
+                    botanical.title,
+                    botanical.image,
+                    labels,
+                    None,
+                ),
+                *botanical.attributes,
+                outcome.title,
+            )
+        for flavor in outcome.flavors:
+            category = known_categories.get(flavor.category.casefold(), flavor.category)
+            add(
+                SearchDocument(
+                    "flavor", flavor.id, flavor.title, flavor.image, labels, category
+                ),
+                *flavor.notes,
+                category,
+                outcome.title,
+            )
+
+    vocabulary = tuple(sorted(terms))
+    typo_variants: dict[str, list[str]] = defaultdict(list)
+    for term in vocabulary:
+        if len(term) >= TYPO_MIN - 1:
+            for variant in {term, *deletions(term)}:
+                typo_variants[variant].append(term)
+
+    return SearchIndex(
+        documents=tuple(documents),
+        titles=freeze_postings(titles),
+        terms=freeze_postings(terms),
+        vocabulary=vocabulary,
+        typo_variants=MappingProxyType(
+            {variant: tuple(matches) for variant, matches in typo_variants.items()}
+        ),
+        facets=MappingProxyType(
+            {
+                "kind": build_facet(
+                    [(document.kind,) for document in documents], KINDS
+                ),
+                "outcome": build_facet([document.outcomes for document in documents]),
+                "category": build_facet(
+                    [(document.category,) for document in documents], flavor_categories
+                ),
+            }
+        ),
+    )
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from app.catalog_db import seed_catalog
+from app.data import CUSTOM_BLEND_OUTCOMES, PRODUCTS
+from app.db import Base, SessionLocal, engine
+from app.inventory import catalog_skus, seed_inventory
+
+
+def main() -> None:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db, db.begin():
+        seed_catalog(db)
+        seed_inventory(db, catalog_skus(PRODUCTS, CUSTOM_BLEND_OUTCOMES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Optional, Sequence
+
+import httpx
+import uvicorn
+
+from app.catalog import CatalogSnapshot, build_snapshot, get_snapshot, install_snapshot
+from app.catalog_provider import CatalogReloader, validate_catalog
+from app.db import async_engine, engine
+from app.main import app, catalog_reloader, templates
+from app.templating import precompile_templates
+
+logger = logging.getLogger(__name__)
+
+RESPAWN_DELAY_SECONDS = 1.0
+WARM_PATHS = (
+    "/",
+    "/custom-blend/step-1",
+    "/custom-blend/step-2",
+    "/custom-blend/step-3",
+    "/custom-blend/step-4",
+    "/api/catalog",
+)
+
+
+async def preload_catalog(reloader: CatalogReloader) -> CatalogSnapshot:
+    try:
+        catalog = await reloader.load()
+        if catalog is not None:
+            validate_catalog(catalog)
+            install_snapshot(build_snapshot(**catalog))
+        return get_snapshot()
+    finally:
+        await async_engine.dispose()
+
+
+async def warm_pages(application, snapshot: CatalogSnapshot) -> int:
+    paths = [*WARM_PATHS, *(f"/products/{product.id}" for product in snapshot.products)]
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warm") as client:
+        for path in paths:
+            (await client.get(path)).raise_for_status()
+    return len(paths)
+
+
+def prepare(warm: bool) -> None:
+    started = time.perf_counter()
+    snapshot = asyncio.run(preload_catalog(catalog_reloader))
+    compiled = precompile_templates(templates.env)
+    app.state.catalog_preloaded = True
+    warmed = asyncio.run(warm_pages(app, snapshot)) if warm else 0
+    engine.dispose()
+    gc.collect()
+    gc.freeze()
+    if threading.active_count() > 1:
+        logger.warning("Forking with %d live threads", threading.active_count())
+    logger.info(
+        "Preloaded catalog %s, %d templates and %d pages in %.1f ms; "
+        "%d objects frozen for copy-on-write sharing",
+        snapshot.version,
+        len(compiled),
+        warmed,
+        (time.perf_counter() - started) * 1000,
+        gc.get_freeze_count(),
+    )
+
+
+def run_worker(application, listener: socket.socket, log_level: str) -> None:
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+    config = uvicorn.Config(
+        application, log_level=log_level, access_log=False, lifespan="on"
+    )
+    uvicorn.Server(config).run(sockets=[listener])
+
+
+class Supervisor:
+    def __init__(
+        self, application, listener: socket.socket, workers: int, log_level: str
+    ) -> None:
+        self.application = application
+        self.listener = listener
+        self.workers = workers
+        self.log_level = log_level
+        self.children: dict[int, int] = {}
+        self.stopping = False
+
+    def spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run_worker(self.application, self.listener, self.log_level)
+            except BaseException:
+                logger.exception("Worker %d crashed", slot)
+                status = 1
+            finally:
+                os._exit(status)
+        self.children[pid] = slot
+        logger.info("Started worker %d (pid %d)", slot, pid)
+
+    def stop(self, signum: int, frame) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for slot in range(self.workers):
+            self.spawn(slot)
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            logger.warning(
+                "Worker %d (pid %d) exited with status %d; restarting",
+                slot,
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            time.sleep(RESPAWN_DELAY_SECONDS)
+            if not self.stopping:
+                self.spawn(slot)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve the app from N forked workers sharing a preloaded catalog."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument(
+        "--no-warm", action="store_true", help="Skip pre-rendering cached pages."
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=args.log_level.upper(), format="%(asctime)s %(name)s %(message)s"
+    )
+
+    prepare(warm=not args.no_warm)
+
+    listener = socket.create_server((args.host, args.port), backlog=args.backlog)
+    listener.set_inheritable(True)
+    logger.info("Listening on http://%s:%d", args.host, args.port)
+    Supervisor(app, listener, args.workers, args.log_level).run()
+    listener.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence
+from urllib.parse import unquote, urlsplit
+
+from pydantic import BaseModel, Field, ValidationError
+
+from app.catalog import CatalogSnapshot
+from app.orders import OrderBlendRequest, OrderError, OrderLineRequest, price_lines
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = os.getenv("SESSION_COOKIE", "tea_session")
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "0") == "1"
+SESSION_SECRET = os.getenv("SESSION_SECRET", "")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(14 * 24 * 3600)))
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://127.0.0.1:6379/0")
+SESSION_REDIS_POOL = int(os.getenv("SESSION_REDIS_POOL", "8"))
+SIGNATURE_LENGTH = 27
+
+if not SESSION_SECRET:
+    SESSION_SECRET = secrets.token_hex(32)
+    logger.warning(
+        "SESSION_SECRET is not set; cart cookies will not survive a restart "
+        "or be shared between workers"
+    )
+
+
+class SessionStoreError(Exception):
+    pass
+
+
+class CartState(BaseModel):
+    items: List[OrderLineRequest] = Field(default=[], max_length=50)
+    custom_blend: Optional[OrderBlendRequest] = None
+
+
+def signature(session_id: str, secret: str = SESSION_SECRET) -> str:
+    digest = hmac.new(secret.encode(), session_id.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode()[:SIGNATURE_LENGTH]
+
+
+def sign_session_id(session_id: str, secret: str = SESSION_SECRET) -> str:
+    return f"{session_id}.{signature(session_id, secret)}"
+
+
+def unsign_session_id(
+    value: Optional[str], secret: str = SESSION_SECRET
+) -> Optional[str]:
+    if not value:
+        return None
+    session_id, _, signed = value.rpartition(".")
+    if not session_id or not hmac.compare_digest(
+        signed.encode(), signature(session_id, secret).encode()
+    ):
+        return None
+    return session_id
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(18)
+
+
+class SessionBackend:
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        raise NotImplementedError
+
+    async def set_many(self, values: dict[str, Optional[bytes]], ttl: int) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class MemorySessionBackend(SessionBackend):
+    def __init__(
+        self,
+        max_entries: int = SESSION_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.clock = clock
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        now = self.clock()
+        values: list[Optional[bytes]] = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            values.append(entry[1] if entry is not None else None)
+        return values
+
+    async def set_many(self, values: dict[str, Optional[bytes]], ttl: int) -> None:
+        expires = self.clock() + ttl
+        for key, value in values.items():
+            if value is None:
+                self._entries.pop(key, None)
+                continue
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+def encode_command(args: Sequence[Any]) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body
+    if kind == b"-":
+        return SessionStoreError(body.decode(errors="replace"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise SessionStoreError(f"Unexpected reply from session store: {line!r}")
+
+
+class RedisSessionBackend(SessionBackend):
+    def __init__(
+        self, url: str = SESSION_REDIS_URL, pool_size: int = SESSION_REDIS_POOL
+    ) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.database = int(parts.path.lstrip("/") or 0)
+        self.pool_size = pool_size
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password is not None:
+            setup.append(
+                ("AUTH", self.username, self.password)
+                if self.username
+                else ("AUTH", self.password)
+            )
+        if self.database:
+            setup.append(("SELECT", self.database))
+        if setup:
+            try:
+                await self.execute(reader, writer, setup)
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer
+
+    async def execute(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        commands: Sequence[Sequence[Any]],
+    ) -> list:
+        writer.write(b"".join(encode_command(command) for command in commands))
+        await writer.drain()
+        replies = [await read_reply(reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, SessionStoreError):
+                raise reply
+        return replies
+
+    async def pipeline(self, *commands: Sequence[Any]) -> list:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = None
+            try:
+                connection = self._idle.pop() if self._idle else await self.connect()
+                replies = await self.execute(*connection, commands)
+            except (OSError, asyncio.IncompleteReadError) as error:
+                if connection is not None:
+                    connection[1].close()
+                raise SessionStoreError(f"Session store unavailable: {error}") from error
+            except SessionStoreError:
+                if connection is not None:
+                    self._idle.append(connection)
+                raise
+            self._idle.append(connection)
+            return replies
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        (values,) = await self.pipeline(("MGET", *keys))
+        return values
+
+    async def set_many(self, values: dict[str, Optional[bytes]], ttl: int) -> None:
+        await self.pipeline(
+            *(
+                ("DEL", key) if value is None else ("SET", key, value, "EX", ttl)
+                for key, value in values.items()
+            )
+        )
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+def session_backend(kind: str = SESSION_BACKEND) -> SessionBackend:
+    if kind == "memory":
+        return MemorySessionBackend()
+    if kind == "redis":
+        return RedisSessionBackend()
+    raise ValueError(f"Unknown session backend: {kind}")
+
+
+class SessionStore:
+    def __init__(self, backend: SessionBackend, ttl: int = SESSION_TTL_SECONDS) -> None:
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def keys(session_id: str) -> tuple[str, str]:
+        return f"cart:{session_id}:items", f"cart:{session_id}:blend"
+
+    async def load(self, session_id: Optional[str]) -> CartState:
+        if session_id is None:
+            return CartState()
+        items, blend = await self.backend.get_many(self.keys(session_id))
+        try:
+            return CartState(
+                items=CartState.model_validate_json(items).items if items else [],
+                custom_blend=(
+                    OrderBlendRequest.model_validate_json(blend) if blend else None
+                ),
+            )
+        except ValidationError:
+            logger.warning("Discarding unreadable cart for session %s", session_id)
+            return CartState()
+
+    @staticmethod
+    def encode_items(items: List[OrderLineRequest]) -> Optional[bytes]:
+        if not items:
+            return None
+        return CartState(items=items).model_dump_json(include={"items"}).encode()
+
+    @staticmethod
+    def encode_blend(blend: Optional[OrderBlendRequest]) -> Optional[bytes]:
+        return blend.model_dump_json().encode() if blend is not None else None
+
+    async def save(self, session_id: str, state: CartState) -> None:
+        items_key, blend_key = self.keys(session_id)
+        await self.backend.set_many(
+            {
+                items_key: self.encode_items(state.items),
+                blend_key: self.encode_blend(state.custom_blend),
+            },
+            self.ttl,
+        )
+
+    async def save_items(
+        self, session_id: str, items: List[OrderLineRequest]
+    ) -> None:
+        items_key, _ = self.keys(session_id)
+        await self.backend.set_many({items_key: self.encode_items(items)}, self.ttl)
+
+    async def save_blend(
+        self, session_id: str, blend: Optional[OrderBlendRequest]
+    ) -> None:
+        _, blend_key = self.keys(session_id)
+        await self.backend.set_many({blend_key: self.encode_blend(blend)}, self.ttl)
+
+    async def clear(self, session_id: str) -> None:
+        await self.backend.set_many(dict.fromkeys(self.keys(session_id)), self.ttl)
+
+
+def priced_cart_lines(state: CartState, snapshot: CatalogSnapshot) -> list[dict]:
+    lines: list[dict] = []
+    for item in state.items:
+        try:
+            lines.extend(price_lines([item], None, snapshot))
+        except OrderError:
+            continue
+    blend = state.custom_blend
+    if blend is not None and blend.size_label is not None:
+        try:
+            lines.extend(price_lines([], blend, snapshot))
+        except OrderError:
+            pass
+    return lines
+
+
+def blend_view(
+    blend: OrderBlendRequest, line: Optional[dict], snapshot: CatalogSnapshot
+) -> Optional[dict]:
+    index = snapshot.index
+    outcome = index.outcomes.get(blend.outcome_id)
+    if outcome is None:
+        return None
+    base = index.bases.get(blend.base_id) if blend.base_id else None
+    botanicals = (index.botanicals.get(item_id) for item_id in blend.botanical_ids)
+    flavors = (index.flavors.get(item_id) for item_id in blend.flavor_ids)
+    return {
+        "outcomeId": outcome.id,
+        "outcomeTitle": outcome.title,
+        "baseId": base.id if base else None,
+        "baseTitle": base.title if base else None,
+        "baseImage": base.image if base else None,
+        "baseImageAlt": base.image_alt if base else None,
+        "selectedBotanicals": [
+            {"id": item.id, "title": item.title} for item in botanicals if item
+        ],
+        "selectedFlavors": [
+            {"id": item.id, "title": item.title} for item in flavors if item
+        ],
+        "sizeLabel": line["size_label"] if line else None,
+        "sizeGrams": line["grams"] if line else None,
+        "sizePrice": float(line["unit_price_aud"]) if line else None,
+        "blendName": blend.blend_name,
+    }
+
+
+def cart_view(state: CartState, snapshot: CatalogSnapshot) -> dict:
+    lines = priced_cart_lines(state, snapshot)
+    blend_line = next((line for line in lines if line["kind"] == "blend"), None)
+    return {
+        "items": [
+            {
+                "id": line["product_id"],
+                "name": line["name"],
+                "sizeLabel": line["size_label"],
+                "unitPrice": float(line["unit_price_aud"]),
+                "quantity": line["quantity"],
+                "image": snapshot.index.products[line["product_id"]].image,
+            }
+            for line in lines
+            if line["kind"] == "product"
+        ],
+        "blend": (
+            blend_view(state.custom_blend, blend_line, snapshot)
+            if state.custom_blend is not None
+            else None
+        ),
+        "count": sum(line["quantity"] for line in lines),
+        "total": float(sum(line["total_aud"] for line in lines)),
+    }
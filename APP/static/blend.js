@@ -1,4 +1,7 @@
 const STORAGE_KEY = "teaAlchemyBlend";
+const BLEND_ENDPOINT = "/api/cart/blend";
+const BLEND_SYNC_DELAY = 400;
+const FRAGMENT_ENDPOINT = "/custom-blend/fragment";
 
 const outcomeCards = document.querySelectorAll(".outcome-card");
 const previewTitle = document.querySelector("[data-preview-title]");
@@ -19,15 +22,15 @@ const radarPoints = radarChart ? radarChart.querySelector("[data-radar-points]")
 const radarLabels = radarChart ? radarChart.querySelector("[data-radar-labels]") : null;
 const radarScores = document.querySelector("[data-radar-scores]");
 const baseEmpty = document.querySelector("[data-base-empty]");
-const baseGrids = document.querySelectorAll("[data-base-grid]");
-const baseCards = document.querySelectorAll(".base-card");
+let baseGrids = document.querySelectorAll("[data-base-grid]");
+let baseCards = document.querySelectorAll(".base-card");
 const botanicalEmpty = document.querySelector("[data-botanical-empty]");
 const botanicalWarning = document.querySelector("[data-botanical-warning]");
-const botanicalGrids = document.querySelectorAll("[data-botanical-grid]");
-const botanicalCards = document.querySelectorAll(".botanical-card");
+let botanicalGrids = document.querySelectorAll("[data-botanical-grid]");
+let botanicalCards = document.querySelectorAll(".botanical-card");
 const flavorEmpty = document.querySelector("[data-flavor-empty]");
-const flavorGrids = document.querySelectorAll("[data-flavor-grid]");
-const flavorCards = document.querySelectorAll(".flavor-card");
+let flavorGrids = document.querySelectorAll("[data-flavor-grid]");
+let flavorCards = document.querySelectorAll(".flavor-card");
 const flavorWarning = document.querySelector("[data-flavor-warning]");
 const flavorSpectrum = document.querySelector("[data-flavor-spectrum]");
 const continueButton = document.querySelector("[data-continue]");
@@ -36,6 +39,7 @@ const nameInput = document.querySelector("[data-blend-name]");
 const nameHelp = document.querySelector("[data-blend-name-help]");
 const stepContainer = document.querySelector("[data-blend-step]");
 const stepNextButton = document.querySelector("[data-step-next]");
+const fragmentSlot = document.querySelector("[data-blend-fragment]");
 
 const NAME_MIN = 3;
 const NAME_MAX = 32;
@@ -267,6 +271,31 @@ const getStoredSelection = () => {
   }
 };
 
+let blendSyncTimer = null;
+
+const syncSelection = (selection) => {
+  window.clearTimeout(blendSyncTimer);
+  blendSyncTimer = window.setTimeout(() => {
+    const payload = selection.outcomeId
+      ? {
+          outcome_id: selection.outcomeId,
+          base_id: selection.baseId || null,
+          botanical_ids: (selection.selectedBotanicals || []).map((item) => item.id),
+          flavor_ids: (selection.selectedFlavors || []).map((item) => item.id),
+          size_label: selection.sizeLabel || null,
+          blend_name: selection.blendName || null,
+        }
+      : null;
+    fetch(BLEND_ENDPOINT, {
+      method: "PUT",
+      headers: { "Content-Type": "application/json" },
+      credentials: "same-origin",
+      keepalive: true,
+      body: JSON.stringify(payload),
+    }).catch(() => {});
+  }, BLEND_SYNC_DELAY);
+};
+
 const storeSelection = (selection) => {
   try {
     const nextSelection = { ...selection };
@@ -281,6 +310,7 @@ const storeSelection = (selection) => {
       nextSelection.selectedBotanicals = existing.selectedBotanicals;
     }
     localStorage.setItem(STORAGE_KEY, JSON.stringify(nextSelection));
+    syncSelection(nextSelection);
   } catch (error) {
     console.warn("Unable to store blend selection", error);
   }
@@ -866,10 +896,6 @@ const applyBaseSelection = (card) => {
   updateStepNavigation(selection);
 };
 
-baseCards.forEach((card) => {
-  card.addEventListener("click", () => applyBaseSelection(card));
-});
-
 const applySizeSelection = (card) => {
   sizeCards.forEach((item) => item.classList.remove("is-selected"));
   card.classList.add("is-selected");
@@ -936,6 +962,7 @@ if (stepNextButton) {
       return;
     }
     const nextUrl = stepNextButton.dataset.nextStepUrl;
+    trackEvent("step_complete", { step: Number(currentStep) });
     if (nextUrl) {
       window.location.href = nextUrl;
     }
@@ -1074,18 +1101,7 @@ const restoreSelection = () => {
 };
 
 const botanicalCardById = new Map();
-botanicalCards.forEach((card) => {
-  if (card.dataset.botanicalId) {
-    botanicalCardById.set(card.dataset.botanicalId, card);
-  }
-});
-
 const flavorCardById = new Map();
-flavorCards.forEach((card) => {
-  if (card.dataset.flavorId) {
-    flavorCardById.set(card.dataset.flavorId, card);
-  }
-});
 
 const isBotanicalAllowed = (card, outcomeId, baseId) => {
   if (!card || !outcomeId || !baseId) {
@@ -1263,10 +1279,6 @@ const toggleBotanicalSelection = (card) => {
   updateStepNavigation(nextSelection);
 };
 
-botanicalCards.forEach((card) => {
-  card.addEventListener("click", () => toggleBotanicalSelection(card));
-});
-
 const toggleFlavorSelection = (card) => {
   const selection = getStoredSelection();
   if (!selection.baseId) {
@@ -1364,8 +1376,66 @@ const toggleFlavorSelection = (card) => {
   updateStepNavigation(nextSelection);
 };
 
-flavorCards.forEach((card) => {
-  card.addEventListener("click", () => toggleFlavorSelection(card));
-});
+const collectCards = () => {
+  baseGrids = document.querySelectorAll("[data-base-grid]");
+  baseCards = document.querySelectorAll(".base-card");
+  botanicalGrids = document.querySelectorAll("[data-botanical-grid]");
+  botanicalCards = document.querySelectorAll(".botanical-card");
+  flavorGrids = document.querySelectorAll("[data-flavor-grid]");
+  flavorCards = document.querySelectorAll(".flavor-card");
+
+  botanicalCardById.clear();
+  flavorCardById.clear();
+  baseCards.forEach((card) => {
+    card.addEventListener("click", () => applyBaseSelection(card));
+  });
+  botanicalCards.forEach((card) => {
+    botanicalCardById.set(card.dataset.botanicalId, card);
+    card.addEventListener("click", () => toggleBotanicalSelection(card));
+  });
+  flavorCards.forEach((card) => {
+    flavorCardById.set(card.dataset.flavorId, card);
+    card.addEventListener("click", () => toggleFlavorSelection(card));
+  });
+};
+
+const loadFragment = async (selection) => {
+  if (!fragmentSlot || !selection.outcomeId) {
+    return;
+  }
+  const step = fragmentSlot.dataset.blendFragment;
+  const params = new URLSearchParams({ outcome: selection.outcomeId });
+  if (step !== "bases" && selection.baseId) {
+    params.set("base", selection.baseId);
+  }
+  if (step === "flavors") {
+    const botanicalIds = (selection.selectedBotanicals || []).map((item) => item.id);
+    params.set("botanicals", botanicalIds.join(","));
+  }
+  try {
+    const response = await fetch(`${FRAGMENT_ENDPOINT}/${step}?${params}`, {
+      credentials: "same-origin",
+    });
+    if (!response.ok) {
+      throw new Error(`Fragment request failed with ${response.status}`);
+    }
+    fragmentSlot.innerHTML = await response.text();
+  } catch (error) {
+    console.warn("Unable to load blend options", error);
+  }
+};
+
+const initBlend = async () => {
+  const selection = getStoredSelection();
+  if (!enforceStepRequirements(selection)) {
+    await loadFragment(selection);
+  }
+  collectCards();
+  restoreSelection();
+};
 
-restoreSelection();
+initBlend();
+
+if (currentStep) {
+  trackEvent("step_view", { step: Number(currentStep) });
+}
@@ -1,5 +1,7 @@
 const CART_KEY = "teaAlchemyCart";
 const BLEND_KEY = "teaAlchemyBlend";
+const CART_ENDPOINT = "/api/cart";
+const BLEND_ENDPOINT = "/api/cart/blend";
 
 const formatCurrency = (amount) => `A$${amount.toFixed(2)}`;
 
@@ -29,8 +31,51 @@ const readBlend = () => {
   }
 };
 
+const syncCart = (items) => {
+  fetch(CART_ENDPOINT, {
+    method: "PUT",
+    headers: { "Content-Type": "application/json" },
+    credentials: "same-origin",
+    keepalive: true,
+    body: JSON.stringify({
+      items: items.map((item) => ({
+        product_id: item.id,
+        size_label: item.sizeLabel,
+        quantity: item.quantity,
+      })),
+    }),
+  }).catch(() => {});
+};
+
+const clearServerBlend = () => {
+  fetch(BLEND_ENDPOINT, {
+    method: "PUT",
+    credentials: "same-origin",
+    keepalive: true,
+  }).catch(() => {});
+};
+
 const writeCart = (items) => {
   localStorage.setItem(CART_KEY, JSON.stringify(items));
+  syncCart(items);
+};
+
+const hydrateFromServer = () => {
+  const node = document.getElementById("cart-state");
+  if (!node) {
+    return;
+  }
+  try {
+    const state = JSON.parse(node.textContent);
+    if (!localStorage.getItem(CART_KEY) && state.items && state.items.length) {
+      localStorage.setItem(CART_KEY, JSON.stringify(state.items));
+    }
+    if (!localStorage.getItem(BLEND_KEY) && state.blend) {
+      localStorage.setItem(BLEND_KEY, JSON.stringify(state.blend));
+    }
+  } catch (error) {
+    console.warn("Unable to read saved cart", error);
+  }
 };
 
 const cartKeyFor = (item) => `${item.id}::${item.sizeLabel}`;
@@ -314,6 +359,7 @@ const bindCartReviewActions = () => {
     const removeBlend = event.target.closest("[data-remove-blend]");
     if (removeBlend) {
       localStorage.removeItem(BLEND_KEY);
+      clearServerBlend();
       renderCartReview(readCart(), readBlend());
     }
   });
@@ -329,17 +375,20 @@ const bindCheckoutButton = () => {
     if (button.disabled) {
       return;
     }
+    trackEvent("cart_checkout");
     window.location.href = "/checkout";
   });
 };
 
 const initCart = () => {
+  hydrateFromServer();
   const cart = readCart();
   const hasReview = Boolean(document.querySelector("[data-cart-review]"));
 
   if (hasReview) {
     renderCartReview(cart, readBlend());
     bindCartReviewActions();
+    trackEvent("cart_view", { properties: { lines: cart.length } });
   } else {
     renderCart(cart);
   }
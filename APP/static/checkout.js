@@ -1,6 +1,8 @@
 const CART_KEY = "teaAlchemyCart";
 const BLEND_KEY = "teaAlchemyBlend";
 const ORDER_KEY = "teaAlchemyOrder";
+const ORDER_IDEMPOTENCY_KEY = "teaAlchemyOrderKey";
+const ORDER_ENDPOINT = "/api/orders";
 
 const SHIPPING_RATES = {
   AU: { base: 6.5, freeThreshold: 65 },
@@ -124,40 +126,73 @@ const calculateShipping = (country, subtotal) => {
 
 const normalizeCardNumber = (value) => value.replace(/\D/g, "");
 
-const buildOrderAddress = (data) => {
-  const parts = [data.address_line1];
-  if (data.address_line2) {
-    parts.push(data.address_line2);
+const getIdempotencyKey = () => {
+  let key = sessionStorage.getItem(ORDER_IDEMPOTENCY_KEY);
+  if (!key) {
+    key = window.crypto && window.crypto.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem(ORDER_IDEMPOTENCY_KEY, key);
   }
-  parts.push(`${data.city} ${data.state} ${data.postal}`);
-  parts.push(data.country === "NZ" ? "New Zealand" : "Australia");
-  return parts.filter(Boolean).join(", ");
+  return key;
 };
 
-const buildOrder = (data, cart, blend, totals, shipping) => {
-  const items = buildOrderItems(cart, blend);
+const buildOrderBlend = (blend) => {
+  if (!blendHasPrice(blend)) {
+    return null;
+  }
+  return {
+    outcome_id: blend.outcomeId,
+    base_id: blend.baseId || null,
+    botanical_ids: (blend.selectedBotanicals || []).map((botanical) => botanical.id),
+    flavor_ids: (blend.selectedFlavors || []).map((flavor) => flavor.id),
+    size_label: blend.sizeLabel || null,
+    blend_name: blend.blendName || null,
+  };
+};
+
+const buildOrderRequest = (data, cart, blend) => {
   const cardNumber = normalizeCardNumber(data.card_number || "");
-  const last4 = cardNumber.length >= 4 ? cardNumber.slice(-4) : "0000";
 
   return {
-    id: `TA-${Date.now().toString(36).toUpperCase()}`,
-    placedAt: new Date().toLocaleString("en-AU"),
-    recipient: `${data.first_name} ${data.last_name}`,
-    address: buildOrderAddress(data),
+    first_name: data.first_name,
+    last_name: data.last_name,
     email: data.email,
-    count: totals.count,
-    items,
-    subtotal: totals.subtotal,
-    shipping,
-    total: totals.subtotal + shipping,
-    payment: {
-      provider: "Tea Alchemy Payments",
-      method: "Card",
-      last4,
-    },
+    phone: data.phone || null,
+    address_line1: data.address_line1,
+    address_line2: data.address_line2 || null,
+    city: data.city,
+    state: data.state,
+    postal: data.postal,
+    country: data.country,
+    delivery_notes: data.delivery_notes || null,
+    card_last4: cardNumber.length >= 4 ? cardNumber.slice(-4) : null,
+    items: cart.map((item) => ({
+      product_id: item.id,
+      size_label: item.sizeLabel,
+      quantity: item.quantity,
+    })),
+    custom_blend: buildOrderBlend(blend),
   };
 };
 
+const submitOrder = async (payload) => {
+  const response = await fetch(ORDER_ENDPOINT, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      "Idempotency-Key": getIdempotencyKey(),
+    },
+    body: JSON.stringify(payload),
+  });
+  const body = await response.json().catch(() => ({}));
+  if (!response.ok) {
+    const detail = typeof body.detail === "string" ? body.detail : null;
+    throw new Error(detail || "We could not place your order. Please try again.");
+  }
+  return body;
+};
+
 const updateStateLabels = (country) => {
   const label = document.querySelector("[data-shipping-state-label]");
   const stateInput = document.querySelector("[data-shipping-state]");
@@ -241,7 +276,7 @@ const bindCheckoutForm = () => {
     return;
   }
 
-  form.addEventListener("submit", (event) => {
+  form.addEventListener("submit", async (event) => {
     event.preventDefault();
     const message = document.querySelector("[data-checkout-message]");
     if (!form.checkValidity()) {
@@ -268,14 +303,31 @@ const bindCheckoutForm = () => {
       return;
     }
 
-    const order = buildOrder(data, cart, blend, totals, shipping);
-    localStorage.setItem(ORDER_KEY, JSON.stringify(order));
-    localStorage.removeItem(CART_KEY);
-    localStorage.removeItem(BLEND_KEY);
-    window.location.href = "/confirmation";
+    const submitButton = document.querySelector("[data-checkout-submit]");
+    if (submitButton) {
+      submitButton.disabled = true;
+    }
+
+    try {
+      const order = await submitOrder(buildOrderRequest(data, cart, blend));
+      localStorage.setItem(ORDER_KEY, JSON.stringify(order));
+      localStorage.removeItem(CART_KEY);
+      localStorage.removeItem(BLEND_KEY);
+      sessionStorage.removeItem(ORDER_IDEMPOTENCY_KEY);
+      trackEvent("order_submit", { properties: { items: totals.count } });
+      window.location.href = "/confirmation";
+    } catch (error) {
+      if (message) {
+        message.textContent = error.message;
+      }
+      if (submitButton) {
+        submitButton.disabled = false;
+      }
+    }
   });
 
   form.addEventListener("input", (event) => {
+    sessionStorage.removeItem(ORDER_IDEMPOTENCY_KEY);
     if (event.target.matches("[data-shipping-country]")) {
       updateStateLabels(event.target.value);
     }
@@ -286,6 +338,7 @@ const bindCheckoutForm = () => {
 const initCheckout = () => {
   bindCheckoutForm();
   updateSummary();
+  trackEvent("checkout_view");
   const countrySelect = document.querySelector("[data-shipping-country]");
   if (countrySelect) {
     updateStateLabels(countrySelect.value);
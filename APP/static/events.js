@@ -0,0 +1,18 @@
+const EVENTS_ENDPOINT = "/api/events";
+
+const trackEvent = (name, details = {}) => {
+  const body = JSON.stringify({
+    events: [{ name, path: window.location.pathname, ...details }],
+  });
+  const payload = new Blob([body], { type: "application/json" });
+  if (navigator.sendBeacon && navigator.sendBeacon(EVENTS_ENDPOINT, payload)) {
+    return;
+  }
+  fetch(EVENTS_ENDPOINT, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    credentials: "same-origin",
+    keepalive: true,
+    body,
+  }).catch(() => {});
+};
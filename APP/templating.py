@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+BASE_DIR = Path(__file__).resolve().parent
+TEMPLATES_DIR = BASE_DIR / "templates"
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", str(BASE_DIR / ".jinja-cache"))
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "1") == "1"
+TEMPLATE_STREAMING = os.getenv("TEMPLATE_STREAMING", "1") == "1"
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", "65536"))
+HEAD_END = "</head>"
+
+
+def bytecode_cache(
+    directory: Optional[str] = TEMPLATE_CACHE_DIR,
+) -> Optional[FileSystemBytecodeCache]:
+    if not directory:
+        return None
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(directory, pattern="tea-alchemy-%s.cache")
+
+
+def template_options() -> dict:
+    return {
+        "bytecode_cache": bytecode_cache(),
+        "auto_reload": TEMPLATE_AUTO_RELOAD,
+    }
+
+
+def precompile_templates(environment: Environment) -> list[str]:
+    names = environment.list_templates(extensions=["html"])
+    for name in names:
+        environment.get_template(name)
+    return names
+
+
+def stream_template(
+    template: Template, context: dict, chunk_bytes: int = STREAM_CHUNK_BYTES
+) -> Iterator[bytes]:
+    buffered: list[str] = []
+    size = 0
+    head_sent = False
+    for piece in template.generate(context):
+        buffered.append(piece)
+        size += len(piece)
+        closes_head = not head_sent and HEAD_END in piece
+        if closes_head or size >= chunk_bytes:
+            head_sent = head_sent or closes_head
+            yield "".join(buffered).encode("utf-8")
+            buffered.clear()
+            size = 0
+    if buffered:
+        yield "".join(buffered).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compile every template into the shared bytecode cache."
+    )
+    parser.add_argument("--cache-dir", default=TEMPLATE_CACHE_DIR or None)
+    parser.add_argument("--clear", action="store_true", help="Drop stale entries first.")
+    args = parser.parse_args()
+    cache = bytecode_cache(args.cache_dir)
+    if cache is None:
+        parser.error("TEMPLATE_CACHE_DIR is empty; set --cache-dir.")
+    if args.clear:
+        cache.clear()
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR), autoescape=True, bytecode_cache=cache
+    )
+    started = time.perf_counter()
+    names = precompile_templates(environment)
+    print(
+        f"Compiled {len(names)} templates into {cache.directory} "
+        f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()